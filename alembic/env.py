@@ -31,10 +31,14 @@ print(f"DEBUG: Current sys.path: {sys.path}")
 from models.user import User
 from models.task import Task, TaskAssignment
 from models.project import Project, ProjectMember
-from models.comment import TaskComment
+from models.comment import TaskComment, CommentMention
 from models.tag import TaskTagLink
-from models.notification import Notification
+from models.notification import Notification, NotificationArchive
 from models.task_dependency import TaskDependencyLink
+from models.outbox import OutboxEvent
+from models.reminder import ReminderLedger
+from models.lease import Lease
+from models.checkpoint import JobCheckpoint
 # --- END FIX ---
 =======
 import sys
@@ -0,0 +1,38 @@
+"""Add job_checkpoints table
+
+Revision ID: 1b9c7e3f5a67
+Revises: 0a8b6d2e4f56
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1b9c7e3f5a67"
+down_revision: Union[str, None] = "0a8b6d2e4f56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("job_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("run_key", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("job_name", "run_key", "shard"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("job_checkpoints")
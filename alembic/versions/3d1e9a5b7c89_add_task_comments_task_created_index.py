@@ -0,0 +1,33 @@
+"""Add task_comments (task_id, created_at) index
+
+Revision ID: 3d1e9a5b7c89
+Revises: 2c0d8f4a6b78
+Create Date: 2026-10-19 16:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3d1e9a5b7c89"
+down_revision: Union[str, None] = "2c0d8f4a6b78"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_task_comments_task_created",
+        "task_comments",
+        ["task_id", "created_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_task_comments_task_created", table_name="task_comments")
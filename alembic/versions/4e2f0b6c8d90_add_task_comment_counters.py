@@ -0,0 +1,46 @@
+"""Add tasks.comment_count and tasks.last_comment_at
+
+Revision ID: 4e2f0b6c8d90
+Revises: 3d1e9a5b7c89
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e2f0b6c8d90"
+down_revision: Union[str, None] = "3d1e9a5b7c89"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tasks",
+        sa.Column("comment_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column("tasks", sa.Column("last_comment_at", sa.DateTime(), nullable=True))
+    # Backfill from existing comments
+    op.execute(
+        """
+        UPDATE tasks SET
+            comment_count = (
+                SELECT COUNT(*) FROM task_comments WHERE task_comments.task_id = tasks.id
+            ),
+            last_comment_at = (
+                SELECT MAX(created_at) FROM task_comments WHERE task_comments.task_id = tasks.id
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("tasks", "last_comment_at")
+    op.drop_column("tasks", "comment_count")
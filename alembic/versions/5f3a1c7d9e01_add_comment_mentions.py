@@ -0,0 +1,48 @@
+"""Add comment_mentions table and MENTION notification type
+
+Revision ID: 5f3a1c7d9e01
+Revises: 4e2f0b6c8d90
+Create Date: 2026-10-19 17:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5f3a1c7d9e01"
+down_revision: Union[str, None] = "4e2f0b6c8d90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE notificationtype ADD VALUE IF NOT EXISTS 'MENTION'")
+    op.create_table(
+        "comment_mentions",
+        sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("comment_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["comment_id"], ["task_comments.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("user_id", "comment_id"),
+    )
+    op.create_index(
+        "ix_comment_mentions_user_created",
+        "comment_mentions",
+        ["user_id", "created_at", "comment_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_comment_mentions_user_created", table_name="comment_mentions")
+    op.drop_table("comment_mentions")
@@ -0,0 +1,29 @@
+"""Add users.last_seen
+
+Revision ID: 6a4b2d8e0f12
+Revises: 5f3a1c7d9e01
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6a4b2d8e0f12"
+down_revision: Union[str, None] = "5f3a1c7d9e01"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("last_seen", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "last_seen")
@@ -0,0 +1,30 @@
+"""Index outbox_events.failed_at for the purge job
+
+Revision ID: 7b5d3f9a1c23
+Revises: 6a4b2d8e0f12
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7b5d3f9a1c23"
+down_revision: Union[str, None] = "6a4b2d8e0f12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        op.f("ix_outbox_events_failed_at"), "outbox_events", ["failed_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_outbox_events_failed_at"), table_name="outbox_events")
@@ -0,0 +1,38 @@
+"""Add notifications.updated_at
+
+Revision ID: 8c6e4a0b2d34
+Revises: 7b5d3f9a1c23
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c6e4a0b2d34"
+down_revision: Union[str, None] = "7b5d3f9a1c23"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("notifications", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    # Coalesced rows had created_at bumped on every merge; it stays as it is
+    op.execute("UPDATE notifications SET updated_at = created_at")
+    op.create_index(
+        "ix_notifications_recipient_updated",
+        "notifications",
+        ["recipient_user_id", "updated_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notifications_recipient_updated", table_name="notifications")
+    op.drop_column("notifications", "updated_at")
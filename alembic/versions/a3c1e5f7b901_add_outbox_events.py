@@ -0,0 +1,54 @@
+"""Add outbox_events table
+
+Revision ID: a3c1e5f7b901
+Revises: f002d37ca6d9
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c1e5f7b901"
+down_revision: Union[str, None] = "f002d37ca6d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("event_type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=False),
+        sa.Column("dispatched_at", sa.DateTime(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_outbox_events_event_type"), "outbox_events", ["event_type"], unique=False
+    )
+    op.create_index(
+        op.f("ix_outbox_events_available_at"), "outbox_events", ["available_at"], unique=False
+    )
+    op.create_index(
+        op.f("ix_outbox_events_dispatched_at"), "outbox_events", ["dispatched_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_outbox_events_dispatched_at"), table_name="outbox_events")
+    op.drop_index(op.f("ix_outbox_events_available_at"), table_name="outbox_events")
+    op.drop_index(op.f("ix_outbox_events_event_type"), table_name="outbox_events")
+    op.drop_table("outbox_events")
@@ -0,0 +1,40 @@
+"""Add notification feed indexes
+
+Revision ID: c4d2f6a8e012
+Revises: a3c1e5f7b901
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4d2f6a8e012"
+down_revision: Union[str, None] = "a3c1e5f7b901"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notifications_recipient_created",
+        "notifications",
+        ["recipient_user_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notifications_recipient_is_read",
+        "notifications",
+        ["recipient_user_id", "is_read"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notifications_recipient_is_read", table_name="notifications")
+    op.drop_index("ix_notifications_recipient_created", table_name="notifications")
@@ -0,0 +1,68 @@
+"""Add notifications_archive table and retention index
+
+Revision ID: d5e3a7b9f123
+Revises: c4d2f6a8e012
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5e3a7b9f123"
+down_revision: Union[str, None] = "c4d2f6a8e012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "notifications_archive",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("recipient_user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("message", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("related_task_id", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("related_project_id", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "type",
+            # Reuse the enum type created for the notifications table
+            postgresql.ENUM(
+                "GENERAL", "COMMENT", "COMMENT_REPLY", "TASK_ASSIGNMENT", "PROJECT_INVITE",
+                name="notificationtype",
+                create_type=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("is_read", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_notifications_archive_recipient_user_id"),
+        "notifications_archive",
+        ["recipient_user_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notifications_is_read_created",
+        "notifications",
+        ["is_read", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notifications_is_read_created", table_name="notifications")
+    op.drop_index(
+        op.f("ix_notifications_archive_recipient_user_id"), table_name="notifications_archive"
+    )
+    op.drop_table("notifications_archive")
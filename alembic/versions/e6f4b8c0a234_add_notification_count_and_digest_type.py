@@ -0,0 +1,40 @@
+"""Add notification count and digest type
+
+Revision ID: e6f4b8c0a234
+Revises: d5e3a7b9f123
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e6f4b8c0a234"
+down_revision: Union[str, None] = "d5e3a7b9f123"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE notificationtype ADD VALUE IF NOT EXISTS 'DIGEST'")
+    op.add_column(
+        "notifications",
+        sa.Column("count", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "notifications_archive",
+        sa.Column("count", sa.Integer(), nullable=False, server_default="1"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("notifications_archive", "count")
+    op.drop_column("notifications", "count")
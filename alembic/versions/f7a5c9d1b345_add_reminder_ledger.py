@@ -0,0 +1,46 @@
+"""Add reminder_ledger table and due-date indexes
+
+Revision ID: f7a5c9d1b345
+Revises: e6f4b8c0a234
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f7a5c9d1b345"
+down_revision: Union[str, None] = "e6f4b8c0a234"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "reminder_ledger",
+        sa.Column("task_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("reminder_kind", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("reminder_date", sa.Date(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["task_id"], ["tasks.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("task_id", "user_id", "reminder_kind", "reminder_date"),
+    )
+    op.create_index(op.f("ix_tasks_due_date"), "tasks", ["due_date"], unique=False)
+    op.create_index(
+        op.f("ix_task_assignments_task_id"), "task_assignments", ["task_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_task_assignments_task_id"), table_name="task_assignments")
+    op.drop_index(op.f("ix_tasks_due_date"), table_name="tasks")
+    op.drop_table("reminder_ledger")
@@ -1,5 +1,9 @@
+import hmac
+import inspect
+import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 
 # Routers - assuming these imports are correct based on your file structure
@@ -10,8 +14,14 @@ from routers.project.routes import router as project_router
 from routers.comment_router import router as comment_router
 from routers.notification_router import router as notification_router
 from routers.dashboard.dashboard_router import router as dashboard_router
-from routers.websocket import ws_comments  # Import WebSocket handlers
+from routers.websocket import ws_channels, ws_comments, ws_notifications  # Import WebSocket handlers
 from routers.copilot.copilot_router import router as copilot_router
+from utils.outbox import outbox_dispatcher
+from utils.backplane import backplane
+from utils.metrics import metrics
+from utils.passwords import password_hasher
+from utils.activity import activity_buffer
+from utils.scheduler import start_scheduler, shutdown_scheduler
 
 # Load environment variables (already present, good!)
 from dotenv import load_dotenv
@@ -24,7 +34,25 @@ async def lifespan(app: FastAPI):
     Handles startup and shutdown events for the FastAPI application.
     This is where we'll run database migrations.
     """
+    await backplane.start()
+    outbox_dispatcher.start()
+    activity_buffer.start()
+    start_scheduler()
     yield
+    # Every shutdown step runs, even if an earlier one fails
+    for step in (
+        shutdown_scheduler,
+        activity_buffer.stop,
+        outbox_dispatcher.stop,
+        backplane.stop,
+        password_hasher.shutdown,
+    ):
+        try:
+            result = step()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"[Shutdown Error] {step.__qualname__}: {e}")
 
 
 app = FastAPI(lifespan=lifespan)
@@ -64,6 +92,20 @@ def health():
     return {"status": "ok"}
 
 
+# In-process metrics (background jobs, real-time tier).
+# Requires `Authorization: Bearer <METRICS_TOKEN>`; disabled when unset.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+@app.get("/metrics")
+def get_metrics(authorization: Optional[str] = Header(default=None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return metrics.snapshot()
+
+
 # Root endpoint (your existing logic)
 @app.get("/")
 def root():
@@ -81,4 +123,6 @@ app.include_router(comment_router)
 app.include_router(notification_router)
 app.include_router(dashboard_router)
 app.include_router(ws_comments.router)
+app.include_router(ws_notifications.router)
+app.include_router(ws_channels.router)
 app.include_router(copilot_router)
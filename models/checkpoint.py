@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+
+# Completed units of work for a background job run, so an interrupted run
+# can resume where it stopped instead of starting over.
+class JobCheckpoint(SQLModel, table=True):
+    """Model for background job progress checkpoints."""
+
+    __tablename__ = "job_checkpoints"
+
+    job_name: str = Field(primary_key=True)
+    run_key: str = Field(primary_key=True)  # identifies one run, e.g. its date
+    shard: int = Field(primary_key=True)
+    completed_at: datetime = Field(default_factory=datetime.now)
+    processed: int = 0
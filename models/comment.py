@@ -1,5 +1,6 @@
 from datetime import datetime
 from typing import Optional, TYPE_CHECKING, List
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from uuid import uuid4
 
@@ -12,6 +13,10 @@ class TaskComment(SQLModel, table=True):
     """Model for task comments."""
 
     __tablename__ = "task_comments"
+    __table_args__ = (
+        # Keyset pagination of a task's comments in both directions
+        Index("ix_task_comments_task_created", "task_id", "created_at", "id"),
+    )
 
     id: str = Field(default_factory=lambda: uuid4().hex, primary_key=True)
 
@@ -37,3 +42,17 @@ class TaskComment(SQLModel, table=True):
     def __repr__(self):
         return (f"<TaskComment(id={self.id}, task_id='{self.task_id}', "
                 f"user_id='{self.user_id}', content='{self.content[:20]}...')>")
+
+
+class CommentMention(SQLModel, table=True):
+    """A user @mentioned in a comment; indexes the "mentions of me" feed."""
+
+    __tablename__ = "comment_mentions"
+    __table_args__ = (
+        # The mentions feed is a range scan on one user's mentions, newest first
+        Index("ix_comment_mentions_user_created", "user_id", "created_at", "comment_id"),
+    )
+
+    user_id: str = Field(foreign_key="users.user_id", primary_key=True)
+    comment_id: str = Field(foreign_key="task_comments.id", primary_key=True)
+    created_at: datetime
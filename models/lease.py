@@ -0,0 +1,15 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+# A named lease held by at most one process at a time (see utils.leader).
+class Lease(SQLModel, table=True):
+    """Model for leader-election leases."""
+
+    __tablename__ = "leases"
+
+    name: str = Field(primary_key=True)
+    holder: Optional[str] = None
+    acquired_at: Optional[datetime] = None
+    expires_at: datetime = Field(default_factory=datetime.now)
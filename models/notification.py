@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Index
 from typing import Optional
 from datetime import datetime
 from uuid import uuid4
@@ -9,6 +9,16 @@ class Notification(SQLModel, table=True):
     """Model for user notifications."""
 
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Keyset pagination of a user's feed, newest first
+        Index("ix_notifications_recipient_created", "recipient_user_id", "created_at", "id"),
+        # WebSocket replay of new and merged notifications
+        Index("ix_notifications_recipient_updated", "recipient_user_id", "updated_at", "id"),
+        # Covers the unread badge count without touching the table
+        Index("ix_notifications_recipient_is_read", "recipient_user_id", "is_read"),
+        # Retention scan for old, read notifications
+        Index("ix_notifications_is_read_created", "is_read", "created_at"),
+    )
 
     id: Optional[str] = Field(default_factory=lambda: uuid4().hex, primary_key=True)
     recipient_user_id: str = Field(foreign_key="users.user_id")
@@ -17,4 +27,25 @@ class Notification(SQLModel, table=True):
     related_project_id: Optional[str] = Field(default=None, foreign_key="project.id")
     type: NotificationType = Field(default=NotificationType.GENERAL)
     is_read: bool = Field(default=False)
+    # Number of events merged into this notification (see utils.core coalescing)
+    count: int = Field(default=1)
     created_at: datetime = Field(default_factory=datetime.now)
+    # Time of the last event merged into this notification
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+
+class NotificationArchive(SQLModel, table=True):
+    """Read notifications moved out of the hot table by utils.retention."""
+
+    __tablename__ = "notifications_archive"
+
+    id: str = Field(primary_key=True)
+    recipient_user_id: str = Field(index=True)
+    message: str
+    related_task_id: Optional[str] = None
+    related_project_id: Optional[str] = None
+    type: NotificationType = Field(default=NotificationType.GENERAL)
+    is_read: bool = Field(default=True)
+    count: int = Field(default=1)
+    created_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,22 @@
+from sqlmodel import SQLModel, Field, Column, JSON
+from typing import Optional
+from datetime import datetime
+from uuid import uuid4
+
+
+# Side effects (notifications, WebSocket pushes, e-mail) recorded in the same
+# commit as the domain change and delivered later by utils.outbox.
+class OutboxEvent(SQLModel, table=True):
+    """Model for transactional outbox events."""
+
+    __tablename__ = "outbox_events"
+
+    id: Optional[str] = Field(default_factory=lambda: uuid4().hex, primary_key=True)
+    event_type: str = Field(index=True)
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    available_at: datetime = Field(default_factory=datetime.now, index=True)
+    dispatched_at: Optional[datetime] = Field(default=None, index=True)
+    failed_at: Optional[datetime] = Field(default=None, index=True)
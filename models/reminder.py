@@ -0,0 +1,16 @@
+from sqlmodel import SQLModel, Field
+from datetime import date, datetime
+
+
+# One row per reminder sent by utils.scheduler.check_due_dates.
+# The composite primary key makes each reminder go out exactly once.
+class ReminderLedger(SQLModel, table=True):
+    """Ledger of due-date reminders already sent."""
+
+    __tablename__ = "reminder_ledger"
+
+    task_id: str = Field(foreign_key="tasks.id", primary_key=True)
+    user_id: str = Field(foreign_key="users.user_id", primary_key=True)
+    reminder_kind: str = Field(primary_key=True)  # 'due_tomorrow', 'due_today' or 'overdue'
+    reminder_date: date = Field(primary_key=True)  # the task's due date
+    sent_at: datetime = Field(default_factory=datetime.now)
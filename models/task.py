@@ -26,7 +26,7 @@ class Task(SQLModel, table=True):
     status: str = "not_started"
     is_completed: bool = False
     priority: Optional[str] = "medium"
-    due_date: Optional[datetime] = None
+    due_date: Optional[datetime] = Field(default=None, index=True)
 
     estimated_time: Optional[float] = 0.5
     actual_time: Optional[float] = 0.5
@@ -43,6 +43,11 @@ class Task(SQLModel, table=True):
     project: Optional["Project"] = Relationship(back_populates="tasks")
 
     comments: List["TaskComment"] = Relationship(back_populates="task")
+    # Last sequence number handed out to a real-time event about this task
+    event_seq: int = Field(default=0)
+    # Maintained by add_comment/delete_comment for list views
+    comment_count: int = Field(default=0)
+    last_comment_at: Optional[datetime] = None
 
     assignments: List["TaskAssignment"] = Relationship(back_populates="task")
 
@@ -78,7 +83,7 @@ class TaskAssignment(SQLModel, table=True):
     id: Optional[str] = Field(
         default_factory=generate_uuid, primary_key=True, index=True
     )
-    task_id: str = Field(foreign_key="tasks.id")
+    task_id: str = Field(foreign_key="tasks.id", index=True)
     user_id: str = Field(foreign_key="users.user_id")
     is_watcher: bool = Field(default=False)
     assigned_at: datetime = Field(default_factory=datetime.now)
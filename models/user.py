@@ -28,6 +28,8 @@ class User(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     last_login: Optional[datetime] = None
+    # Last authenticated request; written in batches by utils.activity
+    last_seen: Optional[datetime] = None
     last_login_ip: Optional[str] = None
 
     tasks: List["Task"] = Relationship(back_populates="user")
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from models.user import User
 from schemas.user import UserCreate, UserRead, UserUpdate
 from db.database import get_session
-from utils.security import hash_password, verify_password, create_access_token
+from utils.security import create_access_token
+from utils.passwords import password_hasher
+from utils.rate_limit import client_address, enforce_rate_limit, rate_limit
+from utils.activity import activity_buffer
 from datetime import datetime
 from utils.security import get_current_user
 
@@ -11,39 +15,56 @@ from utils.security import get_current_user
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
+def _get_user_by_email(session: Session, email: str):
+    return session.exec(select(User).where(User.email == email)).first()
+
+
 # Register route
-@router.post("/register", response_model=UserRead)
-def register_user(user: UserCreate, session: Session = Depends(get_session)):
-    statement = select(User).where(User.email == user.email)
-    existing_user = session.exec(statement).first()
+# Auth routes are async so that waiting on the password hashing pool does not
+# hold a threadpool worker; their database work still runs in the threadpool.
+@router.post("/register", response_model=UserRead, dependencies=[Depends(rate_limit("auth"))])
+async def register_user(user: UserCreate, session: Session = Depends(get_session)):
+    existing_user = await run_in_threadpool(_get_user_by_email, session, user.email)
 
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     new_user = User(
         email=user.email,
-        hashed_password=hash_password(user.password),
+        hashed_password=await password_hasher.hash(user.password),
         full_name=user.full_name,
     )
 
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await run_in_threadpool(session.commit)
+    await run_in_threadpool(session.refresh, new_user)
     return new_user
 
 
 # Login route
-@router.post("/login")
-def login_user(user: UserCreate, session: Session = Depends(get_session)):
-    statement = select(User).where(User.email == user.email)
-    db_user = session.exec(statement).first()
-
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+@router.post("/login", dependencies=[Depends(rate_limit("auth"))])
+async def login_user(request: Request, user: UserCreate, session: Session = Depends(get_session)):
+    # Failed attempts per account and address as well. Only failures are
+    # charged, and only to the address they come from, so nobody can lock
+    # a user out by failing logins for their e-mail.
+    login_client = f"email:{user.email.strip().lower()}:ip:{client_address(request)}"
+    enforce_rate_limit("login_email", login_client, consume=False)
+    db_user = await run_in_threadpool(_get_user_by_email, session, user.email)
+
+    valid, new_hash = (False, None)
+    if db_user:
+        valid, new_hash = await password_hasher.verify_and_update(user.password, db_user.hashed_password)
+    if not valid:
+        enforce_rate_limit("login_email", login_client)
         raise HTTPException(status_code=401, detail="Invalid Username or Password")
 
-    # Update last login time
-    db_user.last_login = datetime.now()
-    session.commit()
+    # Re-hash with the current cost factor if it changed
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await run_in_threadpool(session.commit)
+
+    # Last login time is written in the background, in batches
+    activity_buffer.record_login(db_user.user_id)
 
     # Generate JWT token
     access_token = create_access_token(data={"sub": db_user.user_id})
@@ -78,7 +99,7 @@ def get_user(
 @router.patch(
     "/update", response_model=UserRead, summary="Update current user's profile"
 )
-def update_user_profile(
+async def update_user_profile(
     user_update: UserUpdate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
@@ -92,19 +113,17 @@ def update_user_profile(
         current_user.full_name = user_update.full_name
 
     if user_update.email is not None:
-        email_exists = session.exec(
-            select(User).where(User.email == user_update.email)
-        ).first()
+        email_exists = await run_in_threadpool(_get_user_by_email, session, user_update.email)
         if email_exists and email_exists.user_id != current_user.user_id:
             raise HTTPException(status_code=400, detail="Email already registered")
         current_user.email = user_update.email
     current_user.updated_at = datetime.now()
 
     if user_update.password is not None:
-        current_user.hashed_password = hash_password(user_update.password)
+        current_user.hashed_password = await password_hasher.hash(user_update.password)
 
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await run_in_threadpool(session.commit)
+    await run_in_threadpool(session.refresh, current_user)
 
     return current_user
@@ -1,22 +1,24 @@
-import json
-
-from typing import List
-from sqlmodel import select
+from typing import List, Optional
+from sqlmodel import select, func
 from models.task import Task
 from models.user import User
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 from db.database import get_session
-from schemas.comment import TaskCommentCreate, TaskCommentRead
+from schemas.comment import TaskCommentCreate, TaskCommentRead, TaskCommentWithReplies
+from schemas.user import UserRead
 from utils.security import get_current_user
-from models.comment import TaskComment
-from models.project import Project
-from utils.core import create_notification
-from schemas.notification import NotificationType
-from routers.websocket.ws_comments import active_connections  # Assuming this import path is correct
+from utils.authorization import is_project_owner
+from utils.pagination import encode_cursor, keyset_after, keyset_before
+from utils.mentions import parse_mentions, resolve_mentions
+from models.comment import TaskComment, CommentMention
+from utils.outbox import enqueue_event, enqueue_notifications, outbox_dispatcher
+from schemas.notification import NotificationCreate, NotificationType
+from routers.websocket.ws_comments import COMMENT_BROADCAST
 
 # Import selectinload for eager loading relationships
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager, selectinload
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
@@ -50,48 +52,92 @@ async def add_comment(
             parent_comment_id=comment.parent_comment_id,
         )
         session.add(new_comment)
-        session.commit()
-        session.refresh(new_comment)
 
-        # Send real-time WebSocket message
+        # Notifications
+        notifications = []
+        if comment.parent_comment_id:
+            if parent_comment.user_id != current_user.user_id:
+                notifications.append(
+                    NotificationCreate(
+                        recipient_user_id=parent_comment.user_id,
+                        message=f"{current_user.full_name} replied to your comment on task '{task.title}'",
+                        type=NotificationType.COMMENT_REPLY,
+                        related_task_id=comment.task_id,
+                        related_project_id=task.project_id,
+                    )
+                )
+        else:
+            # Create a notification for the task owner
+            if task.user_id != current_user.user_id:
+                notifications.append(
+                    NotificationCreate(
+                        recipient_user_id=task.user_id,
+                        message=f"{current_user.full_name} commented on your task '{task.title}'",
+                        type=NotificationType.COMMENT,
+                        related_task_id=comment.task_id,
+                        related_project_id=task.project_id,
+                    )
+                )
+
+        # @mentions of users who can see the task: resolved with one user
+        # lookup, indexed for the mentions feed, and notified (instead of the
+        # generic comment notification)
+        mentioned = [
+            user_id
+            for user_id in resolve_mentions(session, parse_mentions(comment.content), task)
+            if user_id != current_user.user_id
+        ]
+        if mentioned:
+            session.add_all(
+                CommentMention(user_id=user_id, comment_id=new_comment.id, created_at=new_comment.created_at)
+                for user_id in mentioned
+            )
+            notifications = [n for n in notifications if n.recipient_user_id not in mentioned]
+            notifications.extend(
+                NotificationCreate(
+                    recipient_user_id=user_id,
+                    message=f"{current_user.full_name} mentioned you on task '{task.title}'",
+                    type=NotificationType.MENTION,
+                    related_task_id=comment.task_id,
+                    related_project_id=task.project_id,
+                )
+                for user_id in mentioned
+            )
+        enqueue_notifications(session, notifications)
+
+        # Bump the task's comment counters and event sequence in one statement.
+        # `seq` orders real-time events per task so reconnecting clients can catch up.
+        seq = session.execute(
+            update(Task)
+            .where(Task.id == task.id)
+            .values(
+                event_seq=Task.event_seq + 1,
+                comment_count=Task.comment_count + 1,
+                last_comment_at=new_comment.created_at,
+            )
+            .returning(Task.event_seq)
+        ).scalar_one()
+
+        # Real-time WebSocket message, delivered by the outbox dispatcher
         payload = {
             "type": "reply" if new_comment.parent_comment_id else "comment",
             "task_id": new_comment.task_id,
+            "project_id": task.project_id,
             "comment_id": new_comment.id,
             "content": new_comment.content,
             "user_id": new_comment.user_id,
             "parent_comment_id": new_comment.parent_comment_id,
             "created_at": new_comment.created_at.isoformat(),
             "full_name": current_user.full_name,
+            "mentions": mentioned,
+            "seq": seq,
         }
+        enqueue_event(session, COMMENT_BROADCAST, payload)
 
-        for connection in active_connections.get(str(new_comment.task_id), []):
-            try:
-                await connection.send_text(json.dumps(payload))
-            except Exception:
-                # Optionally: remove dead connection
-                active_connections[str(new_comment.task_id)].remove(connection)
+        session.commit()
+        session.refresh(new_comment)
+        outbox_dispatcher.wake()
 
-        # Notifications
-        if new_comment.parent_comment_id:
-            if parent_comment.user_id != current_user.user_id:
-                create_notification(
-                    session=session,
-                    recipient_user_id=parent_comment.user_id,
-                    message=f"{current_user.full_name} replied to your comment on task '{task.title}'",
-                    notif_type=NotificationType.COMMENT_REPLY,
-                    task_id=comment.task_id,
-                )
-        else:
-            # Create a notification for the task owner
-            if task.user_id != current_user.user_id:
-                create_notification(
-                    session=session,
-                    recipient_user_id=task.user_id,
-                    message=f"{current_user.full_name} commented on your task '{task.title}'",
-                    notif_type=NotificationType.COMMENT,
-                    task_id=comment.task_id,
-                )
         return new_comment
 
     except Exception as e:
@@ -99,17 +145,148 @@ async def add_comment(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Get all comments for a specific task
+# Comments mentioning the current user, newest first    `GET /comments/mentions/me`
+# A range scan over the user's rows in comment_mentions. Keyset paginated:
+# pass the `X-Next-Cursor` response header back as `?cursor=` for older ones.
+@router.get("/mentions/me", response_model=List[TaskCommentRead])
+def get_my_mentions(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        query = (
+            select(TaskComment)
+            .join(CommentMention, CommentMention.comment_id == TaskComment.id)
+            .where(CommentMention.user_id == current_user.user_id)
+            .options(selectinload(TaskComment.user))
+        )
+        if cursor:
+            query = query.where(keyset_before(CommentMention.created_at, CommentMention.comment_id, cursor))
+
+        comments = session.exec(
+            query.order_by(CommentMention.created_at.desc(), CommentMention.comment_id.desc())
+            .limit(limit + 1)
+        ).all()
+
+        if len(comments) > limit:
+            comments = comments[:limit]
+            last = comments[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+        return comments
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Get the comments of a task, oldest first    `GET /comments/{task_id}`
+# Keyset paginated on (created_at, id). Without a cursor the newest `limit`
+# comments are returned. Pass the `X-Prev-Cursor` response header back as
+# `?before=` for older comments and `X-Next-Cursor` as `?after=` for newer ones;
+# a header is only present when there is more in that direction.
 @router.get("/{task_id}", response_model=List[TaskCommentRead])
-def get_comments_for_task(task_id: str, session: Session = Depends(get_session)):
+def get_comments_for_task(
+    task_id: str,
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    before: Optional[str] = Query(default=None),
+    after: Optional[str] = Query(default=None),
+    session: Session = Depends(get_session),
+):
     try:
+        if before and after:
+            raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
         # Use selectinload to eagerly load the 'user' relationship
+        query = (
+            select(TaskComment)
+            .where(TaskComment.task_id == task_id)
+            .options(selectinload(TaskComment.user))
+        )
+        if after:
+            # Newer comments: walk the index forwards
+            comments = session.exec(
+                query.where(keyset_after(TaskComment.created_at, TaskComment.id, after))
+                .order_by(TaskComment.created_at, TaskComment.id)
+                .limit(limit + 1)
+            ).all()
+            has_newer, has_older = len(comments) > limit, True
+            comments = comments[:limit]
+        else:
+            # Latest or older comments: walk the index backwards
+            if before:
+                query = query.where(keyset_before(TaskComment.created_at, TaskComment.id, before))
+            comments = session.exec(
+                query.order_by(TaskComment.created_at.desc(), TaskComment.id.desc())
+                .limit(limit + 1)
+            ).all()
+            has_older, has_newer = len(comments) > limit, bool(before)
+            comments = list(reversed(comments[:limit]))
+
+        if comments and has_older:
+            response.headers["X-Prev-Cursor"] = encode_cursor(comments[0].created_at, comments[0].id)
+        if comments and has_newer:
+            response.headers["X-Next-Cursor"] = encode_cursor(comments[-1].created_at, comments[-1].id)
+        return comments
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Get the comments of a task as reply threads    `GET /comments/{task_id}/tree`
+# Comments and their authors are loaded with one query and linked into threads
+# through an id -> node map. `limit`/`offset` page over top-level threads;
+# replies nested deeper than `max_depth` are left out.
+@router.get("/{task_id}/tree", response_model=List[TaskCommentWithReplies])
+def get_comment_tree(
+    task_id: str,
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    max_depth: int = Query(default=10, ge=0, le=50),
+    session: Session = Depends(get_session),
+):
+    try:
         comments = session.exec(
             select(TaskComment)
+            .outerjoin(TaskComment.user)
             .where(TaskComment.task_id == task_id)
-            .options(selectinload(TaskComment.user))  # This is the essential line!
+            .options(contains_eager(TaskComment.user))
+            .order_by(TaskComment.created_at, TaskComment.id)
         ).all()
-        return comments
+
+        # Built from columns only, so TaskComment.replies is never lazy-loaded
+        nodes = {
+            c.id: TaskCommentWithReplies(
+                id=c.id,
+                task_id=c.task_id,
+                content=c.content,
+                parent_comment_id=c.parent_comment_id,
+                user_id=c.user_id,
+                created_at=c.created_at,
+                user=UserRead.model_validate(c.user, from_attributes=True) if c.user else None,
+            )
+            for c in comments
+        }
+        threads = []
+        for c in comments:
+            parent = nodes.get(c.parent_comment_id) if c.parent_comment_id else None
+            (parent.replies if parent else threads).append(nodes[c.id])
+
+        page = threads[offset:offset + limit]
+        stack = [(node, 0) for node in page]
+        while stack:
+            node, depth = stack.pop()
+            if depth >= max_depth:
+                node.replies = []
+            else:
+                stack.extend((reply, depth + 1) for reply in node.replies)
+        return page
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -148,23 +325,34 @@ def delete_comment(
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        project_owner_id = None
-        if task.project_id:
-            project = session.get(Project, task.project_id)
-            if project:
-                project_owner_id = project.owner_id
-
         # Authorization check: Only comment author, task owner, or project owner can delete
         is_author = comment.user_id == current_user.user_id
         is_task_owner = task.user_id == current_user.user_id  # Assuming task.user_id is the owner ID
-        is_project_owner = project_owner_id == current_user.user_id
 
-        if not (is_author or is_task_owner or is_project_owner):
+        if not (
+            is_author
+            or is_task_owner
+            or is_project_owner(session, task.project_id, current_user.user_id)
+        ):
             raise HTTPException(
                 status_code=403, detail="You are not authorized to delete this comment"
             )
 
+        session.execute(delete(CommentMention).where(CommentMention.comment_id == comment.id))
         session.delete(comment)
+        session.flush()
+        # Keep the task's comment counters in step; the newest remaining
+        # comment comes from the (task_id, created_at) index
+        session.execute(
+            update(Task)
+            .where(Task.id == task.id)
+            .values(
+                comment_count=Task.comment_count - 1,
+                last_comment_at=select(func.max(TaskComment.created_at))
+                .where(TaskComment.task_id == task.id)
+                .scalar_subquery(),
+            )
+        )
         session.commit()
         return {"message": "Comment deleted successfully"}
 
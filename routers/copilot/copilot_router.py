@@ -8,6 +8,8 @@ from models.task import Task, TaskAssignment
 from schemas.copilot import AIGeneratedProject, PromptRequest, GeneratedProject
 from utils.security import get_session, get_current_user
 from utils.llm import call_gpt_from_user_prompt
+from utils.rate_limit import rate_limit
+from utils.reminder_timer import reschedule_reminders
 
 router = APIRouter(prefix="/copilot", tags=["CoPilot"])
 
@@ -37,6 +39,7 @@ def save_generated_project(
     session.add(project_member)
 
     # 3. Create tasks and assign to owner
+    tasks = []
     for task_data in data.tasks:
         task = Task(
             id=uuid4().hex,
@@ -50,6 +53,7 @@ def save_generated_project(
         )
         session.add(task)
         session.flush()
+        tasks.append((task.id, task.due_date))
 
         # Optional: Assign task to the owner as well
         assignment = TaskAssignment(
@@ -60,11 +64,18 @@ def save_generated_project(
         session.add(assignment)
 
     session.commit()
+    for task_id, due_date in tasks:
+        reschedule_reminders(task_id, due_date)
     return {"message": "Project and tasks saved successfully", "project_id": project.id}
 
 
 # Generate tasks from prompt
-@router.post("/generate-tasks", response_model=GeneratedProject)
+# Rate limited per user (or address): every call costs an LLM request
+@router.post(
+    "/generate-tasks",
+    response_model=GeneratedProject,
+    dependencies=[Depends(rate_limit("llm"))],
+)
 def generate_tasks_from_prompt(
     data: PromptRequest
 ):
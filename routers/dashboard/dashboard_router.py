@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 from utils.security import get_current_user
+from utils.authorization import is_project_member
+from utils.rate_limit import rate_limit
 from db.database import get_session
 from sqlmodel import select, func, or_
 from datetime import datetime, timedelta
@@ -22,6 +24,7 @@ router = APIRouter(
     prefix="/dashboard",
     tags=["Dashboard"],
     responses={404: {"description": "Not found"}},
+    dependencies=[Depends(rate_limit("dashboard"))],
 )
 
 
@@ -176,14 +179,7 @@ def project_dashboard(
         # Check if user is a member or the owner
         is_owner = str(project.owner_id) == str(current_user.user_id)
 
-        member = session.exec(
-            select(ProjectMember).where(
-                ProjectMember.project_id == project_id,
-                ProjectMember.user_id == current_user.user_id,
-            )
-        ).first()
-
-        if not is_owner and not member:
+        if not is_owner and not is_project_member(session, project_id, current_user.user_id):
             raise HTTPException(
                 status_code=403, detail="You are not a member of this project"
             )
@@ -1,13 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
 from typing import List, Optional
-from sqlmodel import Session, select
+from sqlmodel import Session, select, func, update, delete
 
 from models.notification import Notification
-from schemas.notification import NotificationCreate, NotificationRead
+from schemas.notification import NotificationCreate, NotificationRead, NotificationBulkSelect
 
 from db.database import get_session
 from models.user import User
 from utils.security import get_current_user
+from utils.pagination import encode_cursor, keyset_before
 
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
@@ -38,11 +39,16 @@ def create_notification(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Get all notifications for the current user    `GET /notifications` and filter by unread status
-# `GET /notifications?unread=true`
+# Get notifications for the current user, newest first    `GET /notifications`
+# Filter by unread status with `GET /notifications?unread=true`.
+# Keyset paginated on (created_at, id): pass the `X-Next-Cursor` response header
+# back as `?cursor=` to fetch the next page.
 @router.get("/", response_model=List[NotificationRead])
 def get_notifications(
+    response: Response,
     unread: Optional[bool] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
@@ -53,15 +59,102 @@ def get_notifications(
         if unread is not None:
             query = query.where(Notification.is_read == (not unread))
 
+        if cursor:
+            query = query.where(keyset_before(Notification.created_at, Notification.id, cursor))
+
         notifications = session.exec(
-            query.order_by(Notification.created_at.desc())
+            query.order_by(Notification.created_at.desc(), Notification.id.desc())
+            .limit(limit + 1)
         ).all()
+
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            last = notifications[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+
         return notifications
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Get the number of unread notifications    `GET /notifications/unread-count`
+# Answered from the (recipient_user_id, is_read) index, for the bell badge.
+@router.get("/unread-count")
+def get_unread_count(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        count = session.exec(
+            select(func.count()).select_from(Notification).where(
+                Notification.recipient_user_id == current_user.user_id,
+                Notification.is_read == False,  # noqa: E712
+            )
+        ).one()
+        return {"unread_count": count}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Build the WHERE clause for a bulk operation, always scoped to the recipient
+def _bulk_conditions(selection: NotificationBulkSelect, user_id: str):
+    conditions = [Notification.recipient_user_id == user_id]
+    if selection.ids is not None:
+        conditions.append(Notification.id.in_(selection.ids))
+    if selection.before is not None:
+        conditions.append(Notification.created_at <= selection.before)
+    return conditions
+
+
+# Mark many notifications as read in one statement    `PATCH /notifications/read`
+@router.patch("/read")
+def mark_notifications_as_read(
+    selection: NotificationBulkSelect = NotificationBulkSelect(),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        result = session.exec(
+            update(Notification)
+            .where(
+                *_bulk_conditions(selection, current_user.user_id),
+                Notification.is_read == False,  # noqa: E712
+            )
+            .values(is_read=True)
+        )
+        session.commit()
+        return {"updated": result.rowcount}
+
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Delete many notifications in one statement    `DELETE /notifications`
+@router.delete("/")
+def delete_notifications(
+    selection: NotificationBulkSelect = NotificationBulkSelect(),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    try:
+        result = session.exec(
+            delete(Notification).where(
+                *_bulk_conditions(selection, current_user.user_id)
+            )
+        )
+        session.commit()
+        return {"deleted": result.rowcount}
+
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Get a specific notification by ID    `GET /notifications/{notification_id}`
 @router.delete("/{notification_id}")
 def delete_notification(
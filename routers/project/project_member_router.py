@@ -2,13 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, selectinload
 from db.database import get_session
 from utils.security import get_current_user
-from utils.core import create_notification
+from utils.authorization import is_project_member
+from utils.core import create_notifications_bulk
 from sqlalchemy import select
 from typing import Optional
 
 from models.project import ProjectMember, Project
 from models.user import User
-from schemas.notification import NotificationType
+from schemas.notification import NotificationCreate, NotificationType
 from models.notification import Notification
 from schemas.project import (
     ProjectMemberCreate, ProjectMemberRemoveRequest, ProjectMemberReadWithUser,
@@ -83,13 +84,18 @@ def invite_user_to_project(
         inviter = current_user.full_name or current_user.email
         message = f"You've been invited to join the project '{project.title}' by {inviter}."
 
-        create_notification(
-            session=session,
-            recipient_user_id=invited_user.user_id,
-            message=message,
-            notif_type=NotificationType.PROJECT_INVITE,
-            project_id=invite.project_id
+        create_notifications_bulk(
+            session,
+            [
+                NotificationCreate(
+                    recipient_user_id=invited_user.user_id,
+                    message=message,
+                    type=NotificationType.PROJECT_INVITE,
+                    related_project_id=invite.project_id,
+                )
+            ],
         )
+        session.commit()
 
         return {"detail": f"Invitation sent to {invited_user.email or invited_user.user_id}"}
 
@@ -117,14 +123,7 @@ def list_project_members(
     try:
         # --- Access Control Check ---
         # Ensure the current user is a member of the project they are trying to query members for.
-        project_access_check = session.exec(
-            select(ProjectMember).where(
-                ProjectMember.project_id == project_id,
-                ProjectMember.user_id == current_user.user_id
-            )
-        ).first()
-
-        if not project_access_check:
+        if not is_project_member(session, project_id, current_user.user_id):
             raise HTTPException(
                 status_code=403,
                 detail="Not authorized to view members of this project. You must be a member."
@@ -344,11 +343,4 @@ def check_user_project_membership(
     current_user: User = Depends(get_current_user),
     session: Session = Depends(get_session),
 ):
-    is_member = session.exec(
-        select(ProjectMember).where(
-            ProjectMember.project_id == project_id,
-            ProjectMember.user_id == current_user.user_id
-        )
-    ).first() is not None
-
-    return {"is_member": is_member}
+    return {"is_member": is_project_member(session, project_id, current_user.user_id)}
@@ -8,6 +8,7 @@ from schemas.project import ProjectCreate, ProjectRead
 
 from db.database import get_session
 from utils.security import get_current_user
+from utils.authorization import is_project_member
 
 
 router = APIRouter()
@@ -151,13 +152,7 @@ def get_project_by_id(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        is_member = (
-            session.query(ProjectMember)
-            .filter_by(project_id=project_id, user_id=current_user.user_id)
-            .first()
-        )
-
-        if not is_member:
+        if not is_project_member(session, project_id, current_user.user_id):
             raise HTTPException(status_code=403, detail="Not a project member")
 
         return project
@@ -2,21 +2,21 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from models.task import Task
-from schemas.task import TaskRead
+from schemas.task import TaskListRead
 from db.database import get_session
 
 router = APIRouter()
 
 
 # Task Filtering by status    `GET /tasks/filter`
-@router.get("/filter", response_model=List[TaskRead])
+@router.get("/filter", response_model=List[TaskListRead])
 def filter_tasks_by_status(status: str, session: Session = Depends(get_session)):
     tasks = session.query(Task).filter(Task.status == status).all()
     return tasks
 
 
 # Get all tasks    `GET /tasks` dependent on other tasks
-@router.get("/dependent-on/{task_id}", response_model=List[TaskRead])
+@router.get("/dependent-on/{task_id}", response_model=List[TaskListRead])
 def get_tasks_that_depend_on(task_id: str, session: Session = Depends(get_session)):
     task = session.get(Task, task_id)
     if not task:
@@ -4,12 +4,13 @@ from models.user import User
 from models.task import Task
 from models.task_dependency import TaskDependencyLink
 from models.tag import Tag
-from schemas.task import TaskCreate, TaskRead, TaskUpdate
+from schemas.task import TaskCreate, TaskListRead, TaskRead, TaskUpdate
 from db.database import get_session
 from utils.security import get_current_user
 from typing import List
 from datetime import datetime, timezone
 from sqlalchemy.exc import SQLAlchemyError
+from utils.reminder_timer import reschedule_reminders
 from .includes import validate_and_append_tags
 
 
@@ -17,7 +18,7 @@ router = APIRouter()
 
 
 # Get all tasks    `GET /tasks`
-@router.get("/", response_model=list[TaskRead])
+@router.get("/", response_model=list[TaskListRead])
 def get_tasks(session: Session = Depends(get_session)):
     try:
         statement = select(Task)
@@ -28,7 +29,7 @@ def get_tasks(session: Session = Depends(get_session)):
 
 
 # Get all tasks for the current user    `GET /tasks/my-tasks`
-@router.get("/my-tasks", response_model=List[TaskRead])
+@router.get("/my-tasks", response_model=List[TaskListRead])
 def get_my_tasks(
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
@@ -123,6 +124,7 @@ def create_task(
 
         session.commit()
         session.refresh(new_task)
+        reschedule_reminders(new_task.id, new_task.due_date)
         return new_task
 
     except HTTPException:
@@ -173,6 +175,9 @@ def update_task(
         session.commit()
         session.refresh(task)
 
+        if "due_date" in update_data:
+            reschedule_reminders(task.id, task.due_date)
+
         return task
 
     except HTTPException:
@@ -236,6 +241,7 @@ def delete_task(
 
         session.delete(task)
         session.commit()
+        reschedule_reminders(task_id, None)
         return {"message": "Task deleted successfully"}
     except Exception:
         session.rollback()
@@ -7,15 +7,14 @@ from sqlmodel import select, delete
 
 from models.task import Task
 from models.task import TaskAssignment
-from models.project import Project
 from models.user import User
-from models.project import ProjectMember
 from schemas.task_assignment import TaskAssignmentCreate, TaskAssignmentRead
 from db.database import get_session
 from utils.security import get_current_user
+from utils.authorization import is_project_owner, project_access
 
-from utils.core import create_notification
-from schemas.notification import NotificationType
+from utils.outbox import enqueue_notifications, outbox_dispatcher
+from schemas.notification import NotificationCreate, NotificationType
 
 router = APIRouter()
 
@@ -33,10 +32,8 @@ def _authorize_task_modification(task: Task, current_user: User, session: Sessio
         return
 
     # If task belongs to a project, check project owner:
-    if task.project_id is not None:
-        project = session.get(Project, task.project_id)
-        if project and project.owner_id == current_user.user_id:
-            return
+    if is_project_owner(session, task.project_id, current_user.user_id):
+        return
 
     raise HTTPException(
         status_code=403, detail="Not authorized to modify task assignments"
@@ -83,12 +80,20 @@ def update_task_assignments(
             )
         )
 
+        # Validate all new assignees with a single lookup
+        if to_add:
+            found_user_ids = set(
+                session.exec(select(User.user_id).where(User.user_id.in_(to_add))).all()
+            )
+            missing = to_add - found_user_ids
+            if missing:
+                raise HTTPException(
+                    status_code=404, detail=f"User {sorted(missing)[0]} not found"
+                )
+
         # Add new assignments
+        notifications = []
         for user_id in to_add:
-            user = session.exec(select(User).where(User.user_id == user_id)).first()
-            if not user:
-                raise HTTPException(status_code=404, detail=f"User {user_id} not found")
-
             assignment = TaskAssignment(
                 task_id=task_id,
                 user_id=user_id,
@@ -96,19 +101,23 @@ def update_task_assignments(
             )
             session.add(assignment)
 
-            # Send notification (excluding self-assignment)
-            if user.user_id != current_user.user_id:
-                notif_msg = f"{current_user.full_name} assigned you to the task: '{task.title}'"
-                create_notification(
-                    session=session,
-                    recipient_user_id=user.user_id,
-                    message=notif_msg,
-                    task_id=task_id,
-                    notif_type=NotificationType.TASK_ASSIGNMENT,
+            # Queue notification (excluding self-assignment)
+            if user_id != current_user.user_id:
+                notifications.append(
+                    NotificationCreate(
+                        recipient_user_id=user_id,
+                        message=f"{current_user.full_name} assigned you to the task: '{task.title}'",
+                        related_task_id=task_id,
+                        related_project_id=task.project_id,
+                        type=NotificationType.TASK_ASSIGNMENT,
+                    )
                 )
 
+        enqueue_notifications(session, notifications)
+
         session.commit()
         session.refresh(task)
+        outbox_dispatcher.wake()
         return task
 
     except HTTPException:
@@ -167,22 +176,29 @@ def assign_user_to_task(
             is_watcher=payload.is_watcher,
         )
         session.add(assignment)
-        session.commit()
-        session.refresh(assignment)
 
         # Send notification only for new assignments (not for is_watcher updates)
         if user.user_id != current_user.user_id:
             notif_msg = (
                 f"{current_user.full_name} assigned you to the task: '{task.title}'"
             )
-            create_notification(
-                session=session,
-                recipient_user_id=user.user_id,
-                message=notif_msg,
-                task_id=payload.task_id,
-                notif_type=NotificationType.TASK_ASSIGNMENT,
+            enqueue_notifications(
+                session,
+                [
+                    NotificationCreate(
+                        recipient_user_id=user.user_id,
+                        message=notif_msg,
+                        related_task_id=payload.task_id,
+                        related_project_id=task.project_id,
+                        type=NotificationType.TASK_ASSIGNMENT,
+                    )
+                ],
             )
 
+        session.commit()
+        session.refresh(assignment)
+        outbox_dispatcher.wake()
+
         return assignment
 
     except HTTPException:
@@ -237,17 +253,23 @@ def add_watcher_to_task(
             task_id=payload.task_id, user_id=payload.user_id, is_watcher=True
         )
         session.add(assignment)
-        session.commit()
-        session.refresh(assignment)
 
         if invited_user.user_id != current_user.user_id:
             notif_msg = f"{current_user.full_name} added you as a watcher to the task: '{task.title}'"
-            create_notification(
-                session=session,
-                recipient_user_id=invited_user.user_id,
-                message=notif_msg,
-                notif_type=NotificationType.TASK_ASSIGNMENT,
+            enqueue_notifications(
+                session,
+                [
+                    NotificationCreate(
+                        recipient_user_id=invited_user.user_id,
+                        message=notif_msg,
+                        type=NotificationType.TASK_ASSIGNMENT,
+                    )
+                ],
             )
+
+        session.commit()
+        session.refresh(assignment)
+        outbox_dispatcher.wake()
         return assignment
 
     except HTTPException:
@@ -275,18 +297,10 @@ def list_task_assignments(
 
         # If the task is in a project, ensure current_user is a project member
         if task.project_id is not None:
-            project = session.get(Project, task.project_id)
-            if not project:
+            access = project_access(session, task.project_id, current_user.user_id)
+            if not access.exists:
                 raise HTTPException(status_code=404, detail="Project not found")
-
-            # Check membership:
-            membership = session.exec(
-                select(ProjectMember).where(
-                    ProjectMember.project_id == project.id,
-                    ProjectMember.user_id == current_user.user_id,
-                )
-            ).first()
-            if not membership:
+            if access.member_role is None:
                 raise HTTPException(status_code=403, detail="Not a project member")
 
         # Otherwise (standalone task), only the task owner can view
@@ -0,0 +1,292 @@
+import asyncio
+import os
+import time
+
+from fastapi import WebSocket, status
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, defaultdict, deque
+from sqlmodel import Session, select
+from db.database import engine
+from models.user import User
+from utils.metrics import metrics
+from utils.security import decode_access_token
+
+
+# Messages a client may fall behind by before it is disconnected
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+# A single send taking longer than this marks the client as stuck
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+# Dead peers are detected by the server's protocol-level ping/pong (uvicorn
+# --ws-ping-interval / --ws-ping-timeout) and by failing or stuck sends.
+# Handlers whose clients answer application pings can also opt in to
+# `require_pong`: the connection then sends {"type": "ping"} every
+# WS_PING_INTERVAL seconds and evicts a client it has not heard from (pong or
+# any other message) for WS_IDLE_TIMEOUT seconds.
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL_SECONDS", "20"))
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+PING_MESSAGE = '{"type": "ping"}'
+
+
+class ClientConnection:
+    """
+    A WebSocket with a bounded send queue drained by its own task.
+    Broadcasting only enqueues, so one slow client never delays the others;
+    a client whose queue fills up or whose send times out is disconnected,
+    as is one that stops answering heartbeats when `require_pong` is set.
+    """
+
+    live = 0
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        on_close: Optional[Callable[["ClientConnection"], None]] = None,
+        max_queue: int = WS_SEND_QUEUE_SIZE,
+        ping_interval: float = WS_PING_INTERVAL,
+        idle_timeout: float = WS_IDLE_TIMEOUT,
+        require_pong: bool = False,
+    ):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.closed = False
+        self.last_seen = time.monotonic()
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.require_pong = require_pong
+        self._on_close = on_close
+        self._held: Optional[List[str]] = None
+        self._task = asyncio.create_task(self._drain())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        ClientConnection.live += 1
+        metrics.set("ws.connections.live", ClientConnection.live)
+
+    # Queue an already-encoded message. Never blocks.
+    def send(self, message: str) -> bool:
+        if self.closed:
+            return False
+        if self._held is not None:
+            if len(self._held) >= self.queue.maxsize:
+                metrics.inc("ws.slow_consumers_disconnected")
+                self.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                return False
+            self._held.append(message)
+            return True
+        try:
+            self.queue.put_nowait((message, time.monotonic()))
+            return True
+        except asyncio.QueueFull:
+            metrics.inc("ws.slow_consumers_disconnected")
+            self.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return False
+
+    # Keep messages sent from now on back until release(), e.g. while a
+    # catch-up for the client is being built
+    def hold(self):
+        if self._held is None:
+            self._held = []
+
+    # Queue `first`, then the messages held back since hold()
+    def release(self, first: List[str] = ()):
+        held, self._held = self._held or [], None
+        for message in [*first, *held]:
+            if not self.send(message):
+                return
+
+    # Receive from the client; any message counts as a sign of life
+    async def receive_text(self) -> str:
+        message = await self.websocket.receive_text()
+        self.last_seen = time.monotonic()
+        return message
+
+    async def _drain(self):
+        try:
+            while True:
+                message, queued_at = await self.queue.get()
+                async with asyncio.timeout(WS_SEND_TIMEOUT):
+                    await self.websocket.send_text(message)
+                metrics.observe("ws.send.latency", time.monotonic() - queued_at)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Send failed or timed out: the client is gone or stuck
+            self.close(code=status.WS_1011_INTERNAL_ERROR)
+
+    async def _heartbeat(self):
+        try:
+            while True:
+                await asyncio.sleep(self.ping_interval)
+                metrics.observe("ws.send_queue.depth", self.queue.qsize())
+                if not self.require_pong:
+                    continue
+                if time.monotonic() - self.last_seen > self.idle_timeout:
+                    metrics.inc("ws.idle_evicted")
+                    self.close(code=status.WS_1001_GOING_AWAY)
+                    return
+                self.send(PING_MESSAGE)
+        except asyncio.CancelledError:
+            pass
+
+    def close(self, code: int = status.WS_1000_NORMAL_CLOSURE):
+        if self.closed:
+            return
+        self.closed = True
+        ClientConnection.live -= 1
+        metrics.set("ws.connections.live", ClientConnection.live)
+        for task in (self._task, self._heartbeat_task):
+            if task is not asyncio.current_task():
+                task.cancel()
+        if self._on_close:
+            self._on_close(self)
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass  # already closed by the client
+
+
+class ConnectionGroups:
+    """
+    Client connections indexed by a key (task id, user id, ...).
+    Only totals are published, never the keys themselves:
+    "ws.connections{group=<label>}" (connections) and
+    "ws.connection_groups{group=<label>}" (distinct keys).
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self.groups: Dict[str, Set[ClientConnection]] = defaultdict(set)
+        self.total = 0
+
+    def add(self, key: str, connection: ClientConnection):
+        connections = self.groups[key]
+        if connection not in connections:
+            connections.add(connection)
+            self.total += 1
+        self._publish()
+
+    def remove(self, key: str, connection: ClientConnection):
+        connections = self.groups.get(key)
+        if connections is None or connection not in connections:
+            return
+        connections.discard(connection)
+        self.total -= 1
+        if not connections:
+            del self.groups[key]
+        self._publish()
+
+    def _publish(self):
+        metrics.set("ws.connections", self.total, group=self.label)
+        metrics.set("ws.connection_groups", len(self.groups), group=self.label)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.groups
+
+    # Enqueue one encoded message for every connection under `key`
+    def broadcast(self, key: str, message: str) -> int:
+        started = time.monotonic()
+        delivered = 0
+        for connection in list(self.groups.get(key, ())):
+            if connection.send(message):
+                delivered += 1
+        metrics.observe("ws.broadcast.fanout", time.monotonic() - started)
+        return delivered
+
+
+class _EventStream:
+    def __init__(self, size: int):
+        # Released events, in sequence order
+        self.events: Deque[Tuple[int, str]] = deque(maxlen=size)
+        # Events that arrived ahead of a missing predecessor, by sequence number
+        self.held: Dict[int, str] = {}
+        # Every sequence number in [first, last] was released or covered by a snapshot
+        self.first: Optional[int] = None
+        self.last: Optional[int] = None
+
+
+class ReplayBuffer:
+    """
+    Orders the events of each key by sequence number and keeps the last `size`
+    of them for catching up clients that reconnect.
+    Events are released strictly in order: one that arrives ahead of a missing
+    predecessor (concurrent dispatchers can deliver events unordered) is held
+    until the gap is filled, or until the caller gives up on it and resyncs
+    from a snapshot. At most `max_keys` keys are kept; the least recently
+    updated are forgotten first.
+    """
+
+    def __init__(self, size: int, max_keys: int):
+        self.size = size
+        self.max_keys = max_keys
+        self._streams: "OrderedDict[str, _EventStream]" = OrderedDict()
+
+    # Record an event. Returns the events it releases, in order: none while it
+    # waits for a predecessor or when it was already released (events may be
+    # redelivered). Returns None for an event older than any this buffer has
+    # seen, which can no longer be delivered in order: the key needs a resync.
+    def add(self, key: str, seq: int, message: str) -> Optional[List[str]]:
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = _EventStream(self.size)
+            if len(self._streams) > self.max_keys:
+                self._streams.popitem(last=False)
+        self._streams.move_to_end(key)
+
+        if stream.last is None:
+            stream.first, stream.last = seq, seq - 1
+        if seq <= stream.last:
+            return [] if seq >= stream.first else None
+        if seq > stream.last + 1:
+            stream.held[seq] = message
+            return []
+        stream.held[seq] = message
+        return self._release(stream)
+
+    def _release(self, stream: _EventStream) -> List[str]:
+        released = []
+        while stream.last + 1 in stream.held:
+            stream.last += 1
+            message = stream.held.pop(stream.last)
+            stream.events.append((stream.last, message))
+            released.append(message)
+        return released
+
+    # The last released sequence number of a key that is waiting for a gap to
+    # be filled, else None
+    def stalled_at(self, key: str) -> Optional[int]:
+        stream = self._streams.get(key)
+        return stream.last if stream is not None and stream.held else None
+
+    # A snapshot at `seq` was sent in place of everything up to it: forget
+    # those events and release what is held after it. Returns None, and
+    # changes nothing, if events past `seq` were released meanwhile.
+    def resync(self, key: str, seq: int) -> Optional[List[str]]:
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = self._streams[key] = _EventStream(self.size)
+        elif stream.last is not None and seq < stream.last:
+            return None
+        stream.events.clear()
+        stream.held = {s: m for s, m in stream.held.items() if s > seq}
+        stream.first, stream.last = 0, seq
+        return self._release(stream)
+
+    # Events after `since_seq`, or None if the buffer cannot show that none
+    # are missing (the gap reaches past its oldest event, or it has none).
+    def since(self, key: str, since_seq: int) -> Optional[List[str]]:
+        stream = self._streams.get(key)
+        if stream is None or not stream.events or stream.events[0][0] > since_seq + 1:
+            return None
+        return [message for seq, message in stream.events if seq > since_seq]
+
+
+# Resolve the `token` query parameter of a WebSocket to a user id
+def authenticate_token(token: Optional[str]) -> Optional[str]:
+    payload = decode_access_token(token) if token else None
+    user_id = payload.get("sub") if payload else None
+    if not user_id:
+        return None
+    with Session(engine) as session:
+        user = session.exec(select(User.user_id).where(User.user_id == user_id)).first()
+    return user
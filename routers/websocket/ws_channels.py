@@ -0,0 +1,133 @@
+import json
+import os
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from typing import Iterable, Optional, Set
+from sqlmodel import Session, select
+from db.database import engine
+from models.task import Task, TaskAssignment
+from utils.authorization import project_access
+from routers.websocket.connections import ClientConnection, ConnectionGroups, authenticate_token
+
+router = APIRouter()
+
+# Channels are named "<kind>:<id>", e.g. "task:3f2a..." or "project:91bc..."
+CHANNEL_KINDS = {"task", "project"}
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "200"))
+
+# channel -> connections subscribed to it (this process only).
+# Publishing looks up the channel directly, so its cost depends on the number
+# of subscribers, not on the number of open connections.
+channel_subscribers = ConnectionGroups(label="channel")
+
+
+# Wrap an already-encoded event for a channel without re-serializing it
+def channel_message(channel: str, event: str) -> str:
+    return f'{{"type": "event", "channel": {json.dumps(channel)}, "event": {event}}}'
+
+
+# Queue an encoded event for every local subscriber of the given channels
+def publish_to_channels(channels: Iterable[str], event: str):
+    for channel in channels:
+        if channel in channel_subscribers:
+            channel_subscribers.broadcast(channel, channel_message(channel, event))
+
+
+def _in_project(session: Session, project_id: str, user_id: str) -> bool:
+    access = project_access(session, project_id, user_id)
+    return access.is_owner or access.member_role is not None
+
+
+# A user may follow a task they own or are assigned to / watching, or any task
+# and project of a project they belong to.
+def _can_subscribe(user_id: str, channel: str) -> bool:
+    kind, _, object_id = channel.partition(":")
+    if kind not in CHANNEL_KINDS or not object_id:
+        return False
+
+    with Session(engine) as session:
+        if kind == "project":
+            return _in_project(session, object_id, user_id)
+
+        task = session.exec(
+            select(Task.user_id, Task.project_id).where(Task.id == object_id)
+        ).first()
+        if not task:
+            return False
+        owner_id, project_id = task
+        if owner_id == user_id:
+            return True
+        assigned = session.exec(
+            select(TaskAssignment.id).where(
+                TaskAssignment.task_id == object_id, TaskAssignment.user_id == user_id
+            )
+        ).first()
+        if assigned:
+            return True
+        return bool(project_id) and _in_project(session, project_id, user_id)
+
+
+def _reply(reply_type: str, channel: Optional[str] = None, detail: Optional[str] = None) -> str:
+    message = {"type": reply_type}
+    if channel is not None:
+        message["channel"] = channel
+    if detail is not None:
+        message["detail"] = detail
+    return json.dumps(message)
+
+
+# Multiplexed real-time stream    `ws /ws?token=<jwt>`
+# Clients send {"action": "subscribe" | "unsubscribe", "channel": "task:<id>"}
+# (or "project:<id>") and receive {"type": "event", "channel": ..., "event": {...}}
+# for every channel they follow, over a single connection. Server pings
+# ({"type": "ping"}) must be answered with {"type": "pong"}; a client silent
+# for WS_IDLE_TIMEOUT_SECONDS is disconnected.
+@router.websocket("/ws")
+async def multiplexed_websocket(websocket: WebSocket, token: Optional[str] = None):
+    user_id = await run_in_threadpool(authenticate_token, token)
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriptions: Set[str] = set()
+
+    def unsubscribe_all(connection: ClientConnection):
+        for channel in subscriptions:
+            channel_subscribers.remove(channel, connection)
+
+    connection = ClientConnection(websocket, on_close=unsubscribe_all, require_pong=True)
+    try:
+        while True:
+            message = await connection.receive_text()
+            try:
+                request = json.loads(message)
+                if isinstance(request, dict) and request.get("type") == "pong":
+                    continue
+                action, channel = request["action"], str(request["channel"])
+            except (ValueError, TypeError, KeyError):
+                connection.send(_reply("error", detail="Expected {\"action\": ..., \"channel\": ...}"))
+                continue
+
+            if action == "subscribe":
+                if channel in subscriptions:
+                    connection.send(_reply("subscribed", channel))
+                elif len(subscriptions) >= WS_MAX_SUBSCRIPTIONS:
+                    connection.send(_reply("error", channel, "Too many subscriptions"))
+                elif not await run_in_threadpool(_can_subscribe, user_id, channel):
+                    connection.send(_reply("error", channel, "Not allowed to subscribe"))
+                else:
+                    subscriptions.add(channel)
+                    channel_subscribers.add(channel, connection)
+                    connection.send(_reply("subscribed", channel))
+            elif action == "unsubscribe":
+                subscriptions.discard(channel)
+                channel_subscribers.remove(channel, connection)
+                connection.send(_reply("unsubscribed", channel))
+            else:
+                connection.send(_reply("error", channel, f"Unknown action '{action}'"))
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # RuntimeError: closed server-side as a slow consumer
+    finally:
+        connection.close()
@@ -1,19 +1,178 @@
+import asyncio
+import json
+import os
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict
-from collections import defaultdict
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+from sqlmodel import Session, select
+from sqlalchemy.orm import selectinload
+from db.database import engine
+from models.comment import TaskComment
+from models.task import Task
+from schemas.comment import TaskCommentRead
+from utils.backplane import backplane
+from utils.metrics import metrics
+from utils.outbox import register_handler
+from routers.websocket.connections import ClientConnection, ConnectionGroups, ReplayBuffer
+from routers.websocket.ws_channels import publish_to_channels
 
 router = APIRouter()
 
-# Track connections per task_id
-active_connections: Dict[str, List[WebSocket]] = defaultdict(list)
+COMMENT_BROADCAST = "comments.broadcast"
+COMMENTS_CHANNEL = "comments"
+
+# Track connections per task_id (this process only)
+comment_viewers = ConnectionGroups(label="task_id")
+
+# Recent events per task (carrying the task's event `seq`) for reconnects
+COMMENT_REPLAY_SIZE = int(os.getenv("COMMENT_REPLAY_SIZE", "100"))
+COMMENT_REPLAY_TASKS = int(os.getenv("COMMENT_REPLAY_TASKS", "1000"))
+recent_comments = ReplayBuffer(COMMENT_REPLAY_SIZE, COMMENT_REPLAY_TASKS)
+# How long an event that arrived ahead of a missing one is held before the
+# task's viewers are sent a snapshot instead
+COMMENT_REORDER_TIMEOUT = float(os.getenv("COMMENT_REORDER_TIMEOUT_SECONDS", "2"))
+# Tasks with a pending gap check
+_stalled_tasks = set()
+
+
+# Outbox handler: fan the comment event out to every worker via the backplane
+async def broadcast_comment(payload: dict):
+    await backplane.publish(COMMENTS_CHANNEL, json.dumps(payload))
+
 
+# Queue an encoded event for this worker's viewers of the task and of its
+# project. Each viewer's own sender task does the actual write.
+def _broadcast(task_id: str, project_id: Optional[str], message: str):
+    comment_viewers.broadcast(task_id, message)
 
+    channels = [f"task:{task_id}"]
+    if project_id:
+        channels.append(f"project:{project_id}")
+    publish_to_channels(channels, message)
+
+
+# Backplane subscriber. The message is forwarded as received, so it is encoded
+# once per event. Sequenced events are forwarded in `seq` order: one that
+# arrives ahead of a missing event waits for it for up to
+# COMMENT_REORDER_TIMEOUT, after which viewers get a snapshot instead.
+async def deliver_comment(message: str):
+    event = json.loads(message)
+    task_id = str(event["task_id"])
+    if "seq" not in event:
+        _broadcast(task_id, event.get("project_id"), message)
+        return
+
+    released = recent_comments.add(task_id, event["seq"], message)
+    if released is None:
+        # Too late to deliver in order
+        await _resync(task_id)
+        return
+    for ready in released:
+        _broadcast(task_id, event.get("project_id"), ready)
+    if not released and task_id not in _stalled_tasks and recent_comments.stalled_at(task_id) is not None:
+        _stalled_tasks.add(task_id)
+        asyncio.create_task(_fill_gap(task_id, recent_comments.stalled_at(task_id)))
+
+
+async def _fill_gap(task_id: str, stalled_at: int):
+    try:
+        await asyncio.sleep(COMMENT_REORDER_TIMEOUT)
+    finally:
+        _stalled_tasks.discard(task_id)
+    if recent_comments.stalled_at(task_id) == stalled_at:
+        await _resync(task_id, stalled_at)
+
+
+# Replace a task's missing events with a snapshot for its viewers. With
+# `stalled_at`, only if the task is still waiting for that gap to be filled.
+async def _resync(task_id: str, stalled_at: Optional[int] = None):
+    snapshot = await run_in_threadpool(_snapshot, task_id)
+    if snapshot is None:
+        return
+    if stalled_at is not None and recent_comments.stalled_at(task_id) != stalled_at:
+        return  # the gap was filled meanwhile
+    seq, project_id, message = snapshot
+    released = recent_comments.resync(task_id, seq)
+    if released is None:
+        return  # events past the snapshot were released meanwhile
+    metrics.inc("ws.comments.resyncs")
+    for ready in [message, *released]:
+        _broadcast(task_id, project_id, ready)
+
+
+register_handler(COMMENT_BROADCAST, broadcast_comment)
+backplane.subscribe(COMMENTS_CHANNEL, deliver_comment)
+
+
+# All comments of a task with its current event sequence:
+# (seq, project_id, encoded {"type": "snapshot"} message), or None if the task
+# does not exist
+def _snapshot(task_id: str) -> Optional[Tuple[int, Optional[str], str]]:
+    with Session(engine) as session:
+        task = session.exec(select(Task.event_seq, Task.project_id).where(Task.id == task_id)).first()
+        if task is None:
+            return None
+        seq, project_id = task
+        comments = session.exec(
+            select(TaskComment)
+            .where(TaskComment.task_id == task_id)
+            .options(selectinload(TaskComment.user))
+        ).all()
+        snapshot = {
+            "type": "snapshot",
+            "task_id": task_id,
+            "seq": seq,
+            "comments": [
+                TaskCommentRead.model_validate(c, from_attributes=True).model_dump(mode="json")
+                for c in comments
+            ],
+        }
+    return seq, project_id, json.dumps(snapshot)
+
+
+# Events a client that last saw `since_seq` has missed, when the replay buffer
+# cannot tell: nothing if the task's sequence has not moved, else a snapshot of
+# all comments followed by any buffered events newer than the snapshot.
+def _catch_up(task_id: str, since_seq: int) -> List[str]:
+    with Session(engine) as session:
+        current_seq = session.exec(select(Task.event_seq).where(Task.id == task_id)).first()
+    if current_seq is None or current_seq <= since_seq:
+        return []
+    snapshot = _snapshot(task_id)
+    if snapshot is None:
+        return []
+    seq, _, message = snapshot
+    return [message] + (recent_comments.since(task_id, seq) or [])
+
+
+# Comment stream of one task    `ws /ws/comments/{task_id}?since_seq=<seq>`
+# Every event carries the task's `seq`. On reconnect, pass the last seq received
+# to replay what was missed; if too much was missed, a {"type": "snapshot"} with
+# all comments is sent instead. Events arrive in seq order; clients should
+# always apply a snapshot, and ignore other events whose seq is not greater
+# than the last one applied.
 @router.websocket("/ws/comments/{task_id}")
-async def websocket_endpoint(websocket: WebSocket, task_id: str):
+async def websocket_endpoint(websocket: WebSocket, task_id: str, since_seq: Optional[int] = None):
     await websocket.accept()
-    active_connections[task_id].append(websocket)
+    connection = ClientConnection(
+        websocket, on_close=lambda c: comment_viewers.remove(task_id, c)
+    )
+    # Register before replaying so nothing delivered in between is lost, but
+    # hold live events back until the replay has been queued ahead of them
+    connection.hold()
+    comment_viewers.add(task_id, connection)
     try:
+        missed = []
+        if since_seq is not None:
+            missed = recent_comments.since(task_id, since_seq)
+            if missed is None:
+                missed = await run_in_threadpool(_catch_up, task_id, since_seq)
+        connection.release(missed)
+
         while True:
-            await websocket.receive_text()  # Keep connection open
-    except WebSocketDisconnect:
-        active_connections[task_id].remove(websocket)
+            await connection.receive_text()  # Keep connection open
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # RuntimeError: closed server-side as a slow consumer
+    finally:
+        connection.close()
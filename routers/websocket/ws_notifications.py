@@ -0,0 +1,131 @@
+import json
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session, select, or_, and_
+from db.database import engine
+from models.notification import Notification
+from schemas.notification import NotificationRead
+from utils.backplane import backplane
+from utils.core import NEW_NOTIFICATIONS_KEY
+from routers.websocket.connections import ClientConnection, ConnectionGroups, authenticate_token
+
+router = APIRouter()
+
+REPLAY_LIMIT = 100
+# Sent after a replay cut short at REPLAY_LIMIT
+RESYNC_MESSAGE = '{"type": "resync"}'
+
+
+NOTIFICATIONS_CHANNEL = "notifications"
+
+
+class NotificationHub:
+    """Per-user WebSocket connections for real-time notification delivery."""
+
+    def __init__(self):
+        self.connections = ConnectionGroups(label="user_id")
+
+    def connect(self, user_id: str, websocket: WebSocket) -> ClientConnection:
+        connection = ClientConnection(
+            websocket, on_close=lambda c: self.connections.remove(user_id, c)
+        )
+        self.connections.add(user_id, connection)
+        return connection
+
+    # Hand committed notification rows to every worker through the backplane.
+    # Called from whichever thread committed the transaction.
+    def publish(self, rows: List[dict]):
+        batch = [[row["recipient_user_id"], _encode(row)] for row in rows]
+        backplane.publish_threadsafe(NOTIFICATIONS_CHANNEL, json.dumps(batch))
+
+    # Backplane subscriber: deliver to recipients connected to this worker
+    async def deliver(self, message: str):
+        for user_id, encoded in json.loads(message):
+            if user_id in self.connections:
+                self.connections.broadcast(user_id, encoded)
+
+
+notification_hub = NotificationHub()
+backplane.subscribe(NOTIFICATIONS_CHANNEL, notification_hub.deliver)
+
+
+def _encode(row) -> str:
+    notification = NotificationRead.model_validate(row, from_attributes=True)
+    return json.dumps(
+        {"type": "notification", "notification": notification.model_dump(mode="json")}
+    )
+
+
+@event.listens_for(SASession, "after_commit")
+def _publish_committed_notifications(session):
+    rows = session.info.pop(NEW_NOTIFICATIONS_KEY, None)
+    if rows:
+        notification_hub.publish(rows)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_rolled_back_notifications(session):
+    session.info.pop(NEW_NOTIFICATIONS_KEY, None)
+
+
+# Notifications created or merged into after `since_id` was, oldest first, up
+# to REPLAY_LIMIT of them, and whether there were more
+def _missed_notifications(user_id: str, since_id: str) -> Tuple[List[Notification], bool]:
+    with Session(engine) as session:
+        last_seen = session.get(Notification, since_id)
+        if not last_seen or last_seen.recipient_user_id != user_id:
+            return [], False
+        missed = session.exec(
+            select(Notification)
+            .where(
+                Notification.recipient_user_id == user_id,
+                or_(
+                    Notification.updated_at > last_seen.updated_at,
+                    and_(
+                        Notification.updated_at == last_seen.updated_at,
+                        Notification.id > last_seen.id,
+                    ),
+                ),
+            )
+            .order_by(Notification.updated_at, Notification.id)
+            .limit(REPLAY_LIMIT + 1)
+        ).all()
+    return missed[:REPLAY_LIMIT], len(missed) > REPLAY_LIMIT
+
+
+# Per-user notification stream    `ws /ws/notifications?token=<jwt>&since_id=<id>`
+# On reconnect, pass the id of the last notification received as `since_id`
+# to replay anything missed. Coalesced notifications are re-sent with the same
+# id and a higher count, so clients should upsert by notification id. If more
+# than REPLAY_LIMIT were missed, the replay ends with {"type": "resync"} and the
+# client should reload its list with GET /notifications.
+@router.websocket("/ws/notifications")
+async def notifications_websocket(
+    websocket: WebSocket, token: Optional[str] = None, since_id: Optional[str] = None
+):
+    user_id = await run_in_threadpool(authenticate_token, token)
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    # Register before replaying so nothing committed in between is lost
+    connection = notification_hub.connect(user_id, websocket)
+    try:
+        if since_id:
+            missed, truncated = await run_in_threadpool(_missed_notifications, user_id, since_id)
+            for notification in missed:
+                connection.send(_encode(notification))
+            if truncated:
+                connection.send(RESYNC_MESSAGE)
+
+        while True:
+            await connection.receive_text()  # Keep connection open
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # RuntimeError: closed server-side as a slow consumer
+    finally:
+        connection.close()
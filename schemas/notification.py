@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -10,6 +10,8 @@ class NotificationType(str, Enum):
     COMMENT_REPLY = "comment_reply"
     TASK_ASSIGNMENT = "task_assignment"
     PROJECT_INVITE = "project_invite"
+    DIGEST = "digest"
+    MENTION = "mention"
 
 
 class NotificationBase(BaseModel):
@@ -29,7 +31,16 @@ class NotificationCreate(BaseModel):
 class NotificationRead(NotificationCreate):
     id: str
     is_read: bool
+    count: int = 1
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
+
+
+# Selects notifications for bulk read/delete. With neither field set the
+# operation applies to all of the current user's notifications.
+class NotificationBulkSelect(BaseModel):
+    ids: Optional[List[str]] = None
+    before: Optional[datetime] = None  # only notifications created at or before this time
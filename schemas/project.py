@@ -1,7 +1,7 @@
 from typing import Optional, List
 from pydantic import BaseModel
 from datetime import datetime
-from .task import TaskRead
+from .task import TaskListRead
 from .user import UserReadMinimal
 
 
@@ -76,7 +76,7 @@ class ProjectRead(BaseModel):
     created_at: datetime
 
     members: List[ProjectMemberReadWithUser] = []  # List of project members with user details
-    tasks: List[TaskRead] = []  # List of associated tasks
+    tasks: List[TaskListRead] = []  # List of associated tasks
 
     class Config:
         orm_mode = True
@@ -64,7 +64,7 @@ class TaskSummary(BaseModel):
         model_config = {"from_attributes": True}
 
 
-class TaskRead(BaseModel):
+class TaskReadBase(BaseModel):
     id: str
     title: str
     description: Optional[str]
@@ -78,9 +78,10 @@ class TaskRead(BaseModel):
     actual_time: Optional[float]
     user_id: str
     project_id: Optional[str] = None
+    comment_count: int = 0
+    last_comment_at: Optional[datetime] = None
     tags: List[TagReadNested] = []
     dependencies: List[TaskSummary] = []
-    comments: List[TaskCommentSummary] = []
     assignments: List[TaskWatcher] = []
     user: Optional[UserReadMinimal] = Field(alias="owner")
 
@@ -91,7 +92,18 @@ class TaskRead(BaseModel):
         allow_population_by_field_name = True
 
 
+class TaskRead(TaskReadBase):
+    comments: List[TaskCommentSummary] = []
+
+
+# For task listings: comment_count/last_comment_at instead of the comments,
+# so serializing a list never loads the comments table
+class TaskListRead(TaskReadBase):
+    pass
+
+
 TaskRead.model_rebuild()
+TaskListRead.model_rebuild()
 
 
 class TaskUpdate(BaseModel):
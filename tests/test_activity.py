@@ -0,0 +1,20 @@
+import asyncio
+from datetime import datetime
+from sqlmodel import create_engine
+import utils.activity as activity
+from utils.activity import ActivityBuffer
+
+
+def test_stop_survives_an_unreachable_database(monkeypatch):
+    monkeypatch.setattr(activity, "engine", create_engine("sqlite:////nonexistent/dir/devtask.db"))
+    buffer = ActivityBuffer(flush_interval=60)
+    seen_at = datetime.now()
+    buffer.record_seen("u1", seen_at)
+
+    async def run():
+        buffer.start()
+        await buffer.stop()
+
+    asyncio.run(run())
+    # Kept for a later flush
+    assert buffer._last_seen == {"u1": seen_at}
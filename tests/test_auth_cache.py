@@ -0,0 +1,19 @@
+import time
+from models.user import User
+from utils.auth_cache import PrincipalCache
+
+
+def test_principal_cache_hit_and_invalidation():
+    cache = PrincipalCache(ttl=60, max_size=10)
+    user = User(user_id="u1", email="u1@example.com", hashed_password="x", full_name="U1")
+
+    cache.put("token", user, time.time() + 600, cache.version)
+    cached = cache.get("token")
+    assert cached is not user and cached.full_name == "U1"
+
+    stale_version = cache.version
+    cache.forget_user("u1")
+    assert cache.get("token") is None
+    # A row loaded before the invalidation is not cached
+    cache.put("token", user, time.time() + 600, stale_version)
+    assert cache.get("token") is None
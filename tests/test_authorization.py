@@ -0,0 +1,105 @@
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, SQLModel, create_engine, select
+from models.comment import TaskComment
+from models.project import Project, ProjectMember
+from models.task import Task
+from models.user import User
+from routers.comment_router import delete_comment
+from routers.project.project_member_router import check_user_project_membership, list_project_members
+from routers.tasks.task_assignment_router import _authorize_task_modification, list_task_assignments
+from utils.authorization import NO_PROJECT, ProjectAccess, ProjectAccessCache, access_cache, project_access
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for user_id in ("owner", "member", "coowner", "outsider"):
+            session.add(User(user_id=user_id, email=f"{user_id}@example.com", hashed_password="x"))
+        # The owner deliberately has no ProjectMember row
+        session.add(Project(id="p1", title="P1", owner_id="owner"))
+        session.add(ProjectMember(project_id="p1", user_id="member", role="member"))
+        session.add(ProjectMember(project_id="p1", user_id="coowner", role="owner"))
+        session.add(Task(id="t1", title="T1", user_id="member", project_id="p1"))
+        session.add(Task(id="t2", title="T2", user_id="member", project_id="missing"))
+        session.add(TaskComment(id="c1", task_id="t1", user_id="member", content="hi"))
+        session.commit()
+        yield session
+    for project_id in ("p1", "missing"):
+        access_cache.forget(project_id)
+
+
+def _user(session, user_id):
+    return session.exec(select(User).where(User.user_id == user_id)).one()
+
+
+def test_access_cache_caches_outsiders_and_invalidates():
+    cache = ProjectAccessCache(ttl=60, max_size=10)
+    outsider = ProjectAccess(exists=True, is_owner=False, member_role=None)
+    cache.put("p1", "u1", outsider, cache.version)
+    assert cache.get("p1", "u1") == outsider
+    assert cache.get("p1", "u2") is None
+
+    stale_version = cache.version
+    cache.forget("p1")
+    assert cache.get("p1", "u1") is None
+    # Access loaded before the invalidation is not cached
+    cache.put("p1", "u1", outsider, stale_version)
+    assert cache.get("p1", "u1") is None
+
+
+def test_only_the_project_owner_may_modify_assignments_or_delete_comments(session):
+    task = session.get(Task, "t1")
+    _authorize_task_modification(task, _user(session, "owner"), session)
+    with pytest.raises(HTTPException) as denied:
+        _authorize_task_modification(task, _user(session, "coowner"), session)
+    assert denied.value.status_code == 403
+
+    with pytest.raises(HTTPException) as denied:
+        delete_comment("c1", session, _user(session, "coowner"))
+    assert denied.value.status_code == 403
+    assert delete_comment("c1", session, _user(session, "owner"))["message"]
+
+
+def test_membership_means_a_project_member_row(session):
+    assert check_user_project_membership("p1", _user(session, "owner"), session) == {"is_member": False}
+    assert check_user_project_membership("p1", _user(session, "member"), session) == {"is_member": True}
+    with pytest.raises(HTTPException) as denied:
+        list_project_members("p1", session, _user(session, "owner"))
+    assert denied.value.status_code == 403
+    assert len(list_project_members("p1", session, _user(session, "coowner"))) == 2
+
+    assert list_task_assignments("t1", session, _user(session, "member")) == []
+    with pytest.raises(HTTPException) as denied:
+        list_task_assignments("t1", session, _user(session, "owner"))
+    assert denied.value.status_code == 403
+    with pytest.raises(HTTPException) as missing:
+        list_task_assignments("t2", session, _user(session, "member"))
+    assert missing.value.status_code == 404
+
+
+def test_access_follows_committed_membership_changes(session):
+    assert project_access(session, "p1", "outsider") == ProjectAccess(True, False, None)
+    assert project_access(session, "missing", "outsider") == NO_PROJECT
+    assert access_cache.get("p1", "outsider") == ProjectAccess(True, False, None)
+
+    member = ProjectMember(project_id="p1", user_id="outsider", role="member")
+    session.add(member)
+    session.commit()
+    assert project_access(session, "p1", "outsider").member_role == "member"
+
+    member.role = "owner"
+    session.commit()
+    assert project_access(session, "p1", "outsider") == ProjectAccess(True, False, "owner")
+
+    session.delete(member)
+    session.commit()
+    assert project_access(session, "p1", "outsider").member_role is None
+
+    project = session.get(Project, "p1")
+    project.owner_id = "outsider"
+    session.commit()
+    assert project_access(session, "p1", "outsider").is_owner
+    assert not project_access(session, "p1", "owner").is_owner
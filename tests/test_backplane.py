@@ -0,0 +1,106 @@
+import asyncio
+import socket
+from utils import backplane as backplane_module
+from utils.backplane import InMemoryBackplane, ChunkAssembler, PostgresBackplane, split_message
+from utils.metrics import metrics
+
+
+def test_in_memory_backplane_delivers_to_channel_subscribers():
+    backplane = InMemoryBackplane()
+    received = []
+
+    async def on_comment(message):
+        received.append(("comments", message))
+
+    async def on_notification(message):
+        received.append(("notifications", message))
+
+    backplane.subscribe("comments", on_comment)
+    backplane.subscribe("notifications", on_notification)
+
+    async def run():
+        await backplane.start()
+        await backplane.publish("comments", '{"task_id": "t1"}')
+        await backplane.stop()
+
+    asyncio.run(run())
+    assert received == [("comments", '{"task_id": "t1"}')]
+
+
+def test_large_messages_are_split_and_reassembled():
+    message = "é" * 5000
+    chunks = split_message(message, chunk_size=1900)
+    assert len(chunks) == 3
+
+    assembler = ChunkAssembler()
+    assert [assembler.add(chunk) for chunk in chunks] == [None, None, message]
+    assert assembler.add(split_message("small")[0]) == "small"
+
+
+def test_incomplete_messages_expire():
+    assembler = ChunkAssembler(ttl=0)
+    first, second = split_message("x" * 30, chunk_size=20)
+    assert assembler.add(first) is None
+    assert assembler.add(split_message("y" * 30, chunk_size=20)[0]) is None
+    # The first message's partial chunks were dropped in the meantime
+    assert assembler.add(second) is None
+    assert len(assembler._partial) == 1
+
+
+class FakeConnection:
+    def __init__(self, fail: bool):
+        self.fail = fail
+        self.sock, self.peer = socket.socketpair()
+        self.notifies = []
+        self.closed = False
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def execute(self, sql):
+                assert not connection.closed
+
+        return Cursor()
+
+    def poll(self):
+        self.sock.recv(1024)
+        if self.fail:
+            raise ConnectionError("server closed the connection unexpectedly")
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+        self.peer.close()
+
+
+def test_postgres_backplane_reconnects_after_losing_its_connection(monkeypatch):
+    monkeypatch.setattr(backplane_module, "BACKPLANE_RECONNECT_MIN", 0.01)
+    connections = [FakeConnection(fail=True), FakeConnection(fail=False)]
+    backplane = PostgresBackplane("postgresql://unused")
+    backplane.subscribe("comments", lambda message: None)
+    monkeypatch.setattr(backplane, "_connect", lambda: connections.pop(0))
+    reconnects = metrics.snapshot()["counters"].get("backplane.reconnects", 0)
+
+    async def run():
+        await backplane.start()
+        lost = backplane._listen_conn
+        lost.peer.send(b"x")
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if backplane._listen_conn not in (None, lost):
+                break
+        assert lost.closed and not backplane._listen_conn.closed
+        await backplane.stop()
+
+    asyncio.run(run())
+    assert metrics.snapshot()["counters"]["backplane.reconnects"] == reconnects + 1
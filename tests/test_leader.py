@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, update
+from models.lease import Lease
+import utils.leader as leader
+from utils.leader import LeaderLease
+
+
+def test_lease_elects_a_single_leader(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(leader, "engine", engine)
+    events = []
+    a = LeaderLease("scheduler", on_acquired=lambda: events.append("a+"), on_lost=lambda: events.append("a-"))
+    b = LeaderLease("scheduler", on_acquired=lambda: events.append("b+"), on_lost=lambda: events.append("b-"))
+
+    def lease():
+        with Session(engine) as session:
+            return session.get(Lease, "scheduler")
+
+    # Acquire, then renew without re-acquiring
+    assert a.renew() and not b.renew()
+    acquired_at = lease().acquired_at
+    assert a.renew() and not b.renew()
+    assert (a.is_leader(), b.is_leader()) == (True, False)
+    assert (lease().holder, lease().acquired_at) == (a.holder, acquired_at)
+
+    # a stops renewing and its lease expires: b takes over, a steps down
+    with Session(engine) as session:
+        session.exec(update(Lease).values(expires_at=datetime.now() - timedelta(seconds=1)))
+        session.commit()
+    assert b.renew() and not a.renew()
+    assert (a.is_leader(), b.is_leader()) == (False, True)
+    assert lease().holder == b.holder
+
+    # Releasing hands over immediately
+    b.release()
+    assert not b.is_leader()
+    assert a.renew() and not b.renew()
+    assert lease().holder == a.holder
+    assert events == ["a+", "b+", "a-", "b-", "a+"]
@@ -1,5 +1,18 @@
+from fastapi.testclient import TestClient
+import app.main as main
 from app.main import app
 
 
 def test_app_exists():
     assert app is not None
+
+
+def test_metrics_require_the_metrics_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(main, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(main, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200 and "counters" in response.json()
@@ -0,0 +1,27 @@
+from sqlmodel import Session, SQLModel, create_engine
+from models.project import Project, ProjectMember
+from models.task import Task, TaskAssignment
+from models.user import User
+from utils.mentions import parse_mentions, resolve_mentions
+
+
+def test_parse_mentions_handles_ids_and_emails():
+    content = "cc @k3j9x2 and @jane@example.com. Mail bob@example.com, ping @k3j9x2 again"
+    assert parse_mentions(content) == ["k3j9x2", "jane@example.com"]
+
+
+def test_only_users_who_can_see_the_task_are_resolved():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for user_id in ("owner", "assignee", "powner", "member", "stranger"):
+            session.add(User(user_id=user_id, email=f"{user_id}@example.com", hashed_password="x"))
+        session.add(Project(id="p1", title="P1", owner_id="powner"))
+        session.add(ProjectMember(project_id="p1", user_id="member", role="member"))
+        task = Task(id="t1", title="T1", user_id="owner", project_id="p1")
+        session.add(task)
+        session.add(TaskAssignment(task_id="t1", user_id="assignee"))
+        session.commit()
+
+        handles = ["owner", "assignee@example.com", "powner", "member", "stranger", "stranger@example.com"]
+        assert sorted(resolve_mentions(session, handles, task)) == ["assignee", "member", "owner", "powner"]
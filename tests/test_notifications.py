@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+from models.notification import Notification
+from models.user import User
+from routers.websocket import ws_notifications
+from schemas.notification import NotificationCreate, NotificationType
+from utils.core import create_notifications_bulk
+
+
+def test_coalescing_window_is_measured_from_the_first_event():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now()
+
+    def comment(task_id):
+        return NotificationCreate(
+            recipient_user_id="u1", message="new comment", related_task_id=task_id, type=NotificationType.COMMENT
+        )
+
+    with Session(engine) as session:
+        session.add(User(user_id="u1", email="u1@example.com", hashed_password="x"))
+        # t1: first comment 40 minutes ago, last merged 10 minutes ago
+        session.add(Notification(
+            id="n1", recipient_user_id="u1", message="old", related_task_id="t1", type=NotificationType.COMMENT,
+            count=3, created_at=now - timedelta(minutes=40), updated_at=now - timedelta(minutes=10),
+        ))
+        # t2: first comment 20 minutes ago
+        session.add(Notification(
+            id="n2", recipient_user_id="u1", message="old", related_task_id="t2", type=NotificationType.COMMENT,
+            created_at=now - timedelta(minutes=20), updated_at=now - timedelta(minutes=20),
+        ))
+        session.commit()
+
+        create_notifications_bulk(session, [comment("t1"), comment("t2")])
+        session.commit()
+        rows = {row.id: row for row in session.exec(select(Notification)).all()}
+
+    # t1's window closed 10 minutes ago despite the recent merge
+    assert rows.pop("n1").count == 3
+    merged = rows.pop("n2")
+    assert merged.count == 2
+    assert merged.created_at == now - timedelta(minutes=20)
+    assert merged.updated_at > now - timedelta(minutes=1)
+    [fresh] = rows.values()
+    assert (fresh.related_task_id, fresh.count) == ("t1", 1)
+
+
+def test_replay_reports_when_it_was_cut_short(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(ws_notifications, "engine", engine)
+    monkeypatch.setattr(ws_notifications, "REPLAY_LIMIT", 2)
+    now = datetime.now()
+    with Session(engine) as session:
+        session.add(User(user_id="u1", email="u1@example.com", hashed_password="x"))
+        for i in range(4):
+            at = now + timedelta(seconds=i)
+            session.add(Notification(id=f"n{i}", recipient_user_id="u1", message="m", created_at=at, updated_at=at))
+        session.commit()
+
+    missed, truncated = ws_notifications._missed_notifications("u1", "n0")
+    assert ([n.id for n in missed], truncated) == (["n1", "n2"], True)
+    missed, truncated = ws_notifications._missed_notifications("u1", "n1")
+    assert ([n.id for n in missed], truncated) == (["n2", "n3"], False)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from datetime import datetime
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, update
+from models.outbox import OutboxEvent
+from utils import outbox
+from utils.outbox import OutboxDispatcher, register_handler
+
+
+def test_stuck_async_handler_times_out(monkeypatch):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    cancelled = threading.Event()
+
+    async def stuck(payload):
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    register_handler("test.stuck", stuck)
+    monkeypatch.setattr(outbox, "OUTBOX_HANDLER_TIMEOUT", 0.1)
+    dispatcher = OutboxDispatcher()
+    dispatcher._loop = loop
+    try:
+        with pytest.raises(TimeoutError):
+            dispatcher._handle(None, OutboxEvent(event_type="test.stuck", payload={}))
+        assert cancelled.wait(1)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(1)
+
+
+def test_events_claimed_by_another_dispatcher_are_skipped(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(outbox, "engine", engine)
+    handled = []
+    register_handler("test.count", lambda session, payload: handled.append(payload["n"]))
+    with Session(engine) as session:
+        for n in (1, 2):
+            session.add(OutboxEvent(id=f"e{n}", event_type="test.count", payload={"n": n}))
+        session.commit()
+
+    dispatcher = OutboxDispatcher()
+    claim_batch = dispatcher._claim_batch
+
+    # Our claim on e2 lapses and another dispatcher claims it before we get to it
+    def claim_then_lose_e2(session):
+        claimed = claim_batch(session)
+        session.exec(
+            update(OutboxEvent).where(OutboxEvent.id == "e2").values(available_at=datetime.now())
+        )
+        session.commit()
+        return claimed
+
+    monkeypatch.setattr(dispatcher, "_claim_batch", claim_then_lose_e2)
+    assert dispatcher.drain_once() == 2
+    assert handled == [1]
+    with Session(engine) as session:
+        assert session.get(OutboxEvent, "e1").dispatched_at is not None
+        assert session.get(OutboxEvent, "e2").dispatched_at is None
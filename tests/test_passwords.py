@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from passlib.hash import bcrypt
+from utils.passwords import BCRYPT_ROUNDS, PasswordHasher, _hash
+
+
+def test_hash_with_another_cost_is_upgraded_on_verify():
+    hasher = PasswordHasher(workers=1)
+    old_hash = bcrypt.using(rounds=4).hash("secret")
+    try:
+        valid, new_hash = asyncio.run(hasher.verify_and_update("secret", old_hash))
+        assert valid
+        assert new_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+        assert hasher.verify_sync("secret", new_hash)
+        # Current hashes are left alone, wrong passwords never rehash
+        assert asyncio.run(hasher.verify_and_update("secret", new_hash)) == (True, None)
+        assert asyncio.run(hasher.verify_and_update("wrong", old_hash)) == (False, None)
+    finally:
+        hasher.shutdown()
+
+
+def test_saturated_hasher_refuses_with_503():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    try:
+        pending = hasher._submit(_hash, "secret")
+        with pytest.raises(HTTPException) as refused:
+            hasher.hash_sync("secret")
+        assert refused.value.status_code == 503
+        assert refused.value.headers == {"Retry-After": "1"}
+        pending.result()
+    finally:
+        hasher.shutdown()
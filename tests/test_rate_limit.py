@@ -0,0 +1,86 @@
+import asyncio
+import ipaddress
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+import utils.rate_limit as rate_limit_module
+from models.user import User
+from routers import auth_router
+from schemas.user import UserCreate
+from utils.rate_limit import InMemoryRateLimitStore, RateLimiter, RedisRateLimitStore, client_address
+
+
+def _exhaust(limiter):
+    return [limiter.hit("llm", "user:u1") for _ in range(4)]
+
+
+def test_in_memory_bucket_allows_burst_then_rejects():
+    limiter = RateLimiter(InMemoryRateLimitStore(), {"default": (100, 60), "llm": (3, 60)})
+    decisions = _exhaust(limiter)
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions] == [2, 1, 0, 0]
+    headers = decisions[-1].headers()
+    assert headers["RateLimit-Limit"] == "3"
+    assert 1 <= int(headers["Retry-After"]) <= 20
+    # Other clients and route classes have their own buckets
+    assert limiter.hit("llm", "user:u2").allowed
+    assert limiter.hit("dashboard", "user:u1").allowed
+
+
+def test_redis_store_runs_the_bucket_script():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    redis = fakeredis.FakeRedis()
+    limiter = RateLimiter(RedisRateLimitStore(redis), {"default": (100, 60), "llm": (3, 60)})
+    decisions = _exhaust(limiter)
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions] == [2, 1, 0, 0]
+    assert 1 <= int(decisions[-1].headers()["Retry-After"]) <= 20
+    assert 0 < redis.pttl("ratelimit:llm:user:u1") <= 60000
+    assert limiter.hit("llm", "user:u2").allowed
+
+
+def _request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_client_address_trusts_forwarded_for_only_from_proxies(monkeypatch):
+    monkeypatch.setattr(
+        rate_limit_module, "RATE_LIMIT_TRUSTED_PROXIES", [ipaddress.ip_network("172.16.0.0/12")]
+    )
+    assert client_address(_request("172.18.0.2", "203.0.113.7")) == "203.0.113.7"
+    # A client-supplied entry left of the real one is ignored
+    assert client_address(_request("172.18.0.2", "198.51.100.1, 203.0.113.7")) == "203.0.113.7"
+    assert client_address(_request("172.18.0.2")) == "172.18.0.2"
+    # Direct clients cannot pick their own bucket
+    assert client_address(_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_only_failed_logins_are_charged_per_email_and_address(monkeypatch):
+    class FakeHasher:
+        async def verify_and_update(self, password, hashed):
+            return password == "right", None
+
+    limiter = RateLimiter(InMemoryRateLimitStore(), {"default": (100, 60), "login_email": (2, 300)})
+    monkeypatch.setattr(rate_limit_module, "rate_limiter", limiter)
+    monkeypatch.setattr(auth_router, "password_hasher", FakeHasher())
+    monkeypatch.setattr(auth_router, "_get_user_by_email", lambda session, email: User(user_id="u1", email=email))
+    monkeypatch.setattr(auth_router.activity_buffer, "record_login", lambda user_id: None)
+
+    def login(password, peer="203.0.113.7"):
+        user = UserCreate(email="victim@example.com", password=password)
+        try:
+            asyncio.run(auth_router.login_user(_request(peer), user, session=None))
+            return 200
+        except HTTPException as e:
+            return e.status_code
+
+    # Successful logins cost nothing
+    assert [login("right") for _ in range(3)] == [200, 200, 200]
+    assert [login("wrong") for _ in range(3)] == [401, 401, 429]
+    assert login("right") == 429
+    # Failures from one address do not lock the account out elsewhere
+    assert login("right", peer="198.51.100.1") == 200
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import utils.scheduler as scheduler
+from utils.reminder_timer import ReminderTimer
+
+
+def test_pop_due_fires_in_order_and_skips_rescheduled_entries():
+    timer = ReminderTimer()
+    now = datetime.now()
+    timer.schedule("a", now + timedelta(days=5))
+    timer.schedule("b", now + timedelta(days=5))
+
+    # Moving "a" forward leaves its old entries stale in the heap
+    timer.schedule("a", now + timedelta(days=10))
+
+    b_due = timer._due["b"]
+    due_day = b_due.replace(hour=0, minute=0, second=0, microsecond=0)
+    assert timer.pop_due(due_day - timedelta(days=1)) == ["b"]
+    assert timer.pop_due(b_due) == ["b"]
+    assert timer.pop_due(now + timedelta(days=6)) == []
+    assert timer.pop_due(now + timedelta(days=11)) == ["a"]
+    assert len(timer) == 0
+
+
+def test_past_instants_fire_immediately():
+    timer = ReminderTimer()
+    timer.schedule("a", datetime.now() + timedelta(hours=1))
+    assert timer.pop_due() == ["a"]
+
+    timer.cancel("a")
+    assert timer.pop_due(datetime.now() + timedelta(days=1)) == []
+
+
+def test_only_the_leader_applies_published_due_date_changes(monkeypatch):
+    timer = ReminderTimer()
+    monkeypatch.setattr(scheduler, "reminder_timer", timer)
+    due = (datetime.now() + timedelta(days=5)).isoformat()
+
+    monkeypatch.setattr(scheduler.scheduler_lease, "is_leader", lambda: False)
+    asyncio.run(scheduler._apply_reminder_change(json.dumps({"task_id": "a", "due_date": due})))
+    assert len(timer) == 0
+
+    monkeypatch.setattr(scheduler.scheduler_lease, "is_leader", lambda: True)
+    asyncio.run(scheduler._apply_reminder_change(json.dumps({"task_id": "a", "due_date": due})))
+    assert len(timer) == 3
+    asyncio.run(scheduler._apply_reminder_change(json.dumps({"task_id": "a", "due_date": None})))
+    assert timer.pop_due(datetime.now() + timedelta(days=6)) == []
+
+    timer.schedule("b", datetime.now() + timedelta(days=5))
+    timer.seeded_at = datetime.now()
+    timer.clear()
+    assert len(timer) == 0 and timer.seeded_at is None
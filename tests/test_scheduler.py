@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+from models.checkpoint import JobCheckpoint
+from models.notification import Notification
+from models.reminder import ReminderLedger
+from models.task import Task, TaskAssignment
+from models.user import User
+import utils.scheduler as scheduler
+from utils.scheduler import REMINDER_JOB, RUN_STARTED_SHARD
+
+
+def test_interrupted_sweeps_are_resumed_within_a_day(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(scheduler, "engine", engine)
+    now = datetime.now()
+
+    def checkpoint(run_key, shard, at=now):
+        return JobCheckpoint(job_name=REMINDER_JOB, run_key=run_key, shard=shard, completed_at=at)
+
+    with Session(engine) as session:
+        # Interrupted after one of two shards, and before any shard
+        session.add_all([checkpoint("yesterday/2", RUN_STARTED_SHARD), checkpoint("yesterday/2", 0)])
+        session.add(checkpoint("today/2", RUN_STARTED_SHARD))
+        # Complete, and too old to resume
+        session.add_all([checkpoint("done/1", RUN_STARTED_SHARD), checkpoint("done/1", 0)])
+        session.add(checkpoint("old/2", RUN_STARTED_SHARD, now - timedelta(days=2)))
+        session.commit()
+
+    assert sorted(scheduler._incomplete_reminder_runs(now)) == ["today/2", "yesterday/2"]
+    scheduler.resume_due_date_sweeps()
+    assert scheduler._incomplete_reminder_runs(now) == []
+
+
+def _engine_with_due_task(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    monkeypatch.setattr(scheduler, "engine", engine)
+    with Session(engine) as session:
+        for user_id in ("owner", "assignee"):
+            session.add(User(user_id=user_id, email=f"{user_id}@example.com", hashed_password="x"))
+        session.add(Task(id="t1", title="T1", user_id="owner", due_date=datetime.now() + timedelta(hours=1)))
+        session.add_all([TaskAssignment(task_id="t1", user_id=user_id) for user_id in ("owner", "assignee")])
+        session.commit()
+    return engine
+
+
+def _notifications(engine):
+    with Session(engine) as session:
+        return sorted(session.exec(select(Notification.recipient_user_id)).all())
+
+
+def test_each_reminder_is_sent_once(monkeypatch):
+    engine = _engine_with_due_task(monkeypatch)
+    assert scheduler.send_task_reminders(["t1"]) == 2
+    assert scheduler.send_task_reminders(["t1"]) == 0
+    with Session(engine) as session:
+        assert scheduler._send_reminders(session, datetime.now()) == 0
+    assert _notifications(engine) == ["assignee", "owner"]
+
+
+def test_timer_and_sweep_racing_on_one_reminder_send_it_once(monkeypatch):
+    engine = _engine_with_due_task(monkeypatch)
+    with Session(engine) as sweep:
+        execute = sweep.execute
+
+        # The timer sends the reminders after the sweep selected them as unsent
+        def timer_fires_first(statement, *args, **kwargs):
+            if statement.is_insert and statement.table.name == ReminderLedger.__tablename__:
+                assert scheduler.send_task_reminders(["t1"]) == 2
+            return execute(statement, *args, **kwargs)
+
+        monkeypatch.setattr(sweep, "execute", timer_fires_first)
+        with pytest.raises(IntegrityError):
+            scheduler._send_reminders(sweep, datetime.now())
+            sweep.commit()
+        sweep.rollback()
+    assert _notifications(engine) == ["assignee", "owner"]
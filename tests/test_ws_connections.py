@@ -0,0 +1,146 @@
+import asyncio
+import json
+from routers.websocket import ws_comments
+from routers.websocket.connections import ClientConnection, ConnectionGroups, ReplayBuffer
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, message):
+        await asyncio.sleep(self.delay)
+        self.sent.append(message)
+
+    async def close(self, code):
+        self.close_code = code
+
+
+def test_slow_consumer_is_disconnected_without_delaying_others():
+    fast, slow = FakeWebSocket(), FakeWebSocket(delay=10)
+
+    async def run():
+        groups = ConnectionGroups(label="task_id")
+        for websocket in (fast, slow):
+            groups.add(
+                "t1",
+                ClientConnection(websocket, on_close=lambda c: groups.remove("t1", c), max_queue=2),
+            )
+        for i in range(5):
+            groups.broadcast("t1", str(i))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        return len(groups.groups["t1"])
+
+    assert asyncio.run(run()) == 1
+    assert fast.sent == ["0", "1", "2", "3", "4"]
+    assert slow.close_code == 1013
+
+
+def test_idle_client_is_evicted_when_pongs_are_required():
+    websocket = FakeWebSocket()
+
+    async def run():
+        connection = ClientConnection(
+            websocket, ping_interval=0.01, idle_timeout=0.03, require_pong=True
+        )
+        await asyncio.sleep(0.1)
+        return connection.closed
+
+    assert asyncio.run(run()) is True
+    assert websocket.sent[0] == '{"type": "ping"}'
+    assert websocket.close_code == 1001
+
+
+def test_receive_only_client_stays_connected():
+    websocket = FakeWebSocket()
+
+    async def run():
+        connection = ClientConnection(websocket, ping_interval=0.01, idle_timeout=0.03)
+        connection.send("n1")
+        await asyncio.sleep(0.1)
+        connection.send("n2")
+        await asyncio.sleep(0.01)
+        return connection.closed
+
+    assert asyncio.run(run()) is False
+    assert websocket.sent == ["n1", "n2"]
+    assert websocket.close_code is None
+
+
+def test_replay_buffer_releases_events_in_order():
+    buffer = ReplayBuffer(size=3, max_keys=10)
+    assert buffer.add("t1", 1, "e1") == ["e1"]
+    assert buffer.add("t1", 2, "e2") == ["e2"]
+    # 4 waits for 3
+    assert buffer.add("t1", 4, "e4") == []
+    assert buffer.stalled_at("t1") == 2
+    assert buffer.since("t1", 2) == []
+    assert buffer.add("t1", 3, "e3") == ["e3", "e4"]
+    assert buffer.stalled_at("t1") is None
+    assert buffer.add("t1", 5, "e5") == ["e5"]
+    assert buffer.add("t1", 5, "e5") == []
+
+    assert buffer.since("t1", 3) == ["e4", "e5"]
+    assert buffer.since("t1", 2) == ["e3", "e4", "e5"]
+    assert buffer.since("t1", 1) is None
+    assert buffer.since("t2", 0) is None
+    # Older than anything this buffer has seen: cannot be delivered in order
+    assert buffer.add("t1", 0, "e0") is None
+
+
+def test_replay_buffer_resyncs_past_a_gap():
+    buffer = ReplayBuffer(size=3, max_keys=10)
+    buffer.add("t1", 1, "e1")
+    buffer.add("t1", 3, "e3")
+    buffer.add("t1", 5, "e5")
+    # A snapshot at 3 replaces 2 and 3 and releases nothing (4 is missing)
+    assert buffer.resync("t1", 3) == []
+    assert buffer.since("t1", 1) is None
+    assert buffer.add("t1", 2, "e2") == []
+    assert buffer.add("t1", 4, "e4") == ["e4", "e5"]
+    # Outdated snapshot
+    assert buffer.resync("t1", 4) is None
+
+
+def test_held_messages_are_sent_after_the_catch_up():
+    websocket = FakeWebSocket()
+
+    async def run():
+        connection = ClientConnection(websocket)
+        connection.hold()
+        connection.send("live")
+        await asyncio.sleep(0.01)
+        connection.release(["snapshot"])
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert websocket.sent == ["snapshot", "live"]
+
+
+def test_comment_gap_falls_back_to_a_snapshot(monkeypatch):
+    websocket = FakeWebSocket()
+
+    def event(seq):
+        return json.dumps({"task_id": "gap", "seq": seq})
+
+    monkeypatch.setattr(ws_comments, "COMMENT_REORDER_TIMEOUT", 0.01)
+    monkeypatch.setattr(ws_comments, "_snapshot", lambda task_id: (3, None, "snapshot"))
+
+    async def run():
+        connection = ClientConnection(websocket)
+        ws_comments.comment_viewers.add("gap", connection)
+        await ws_comments.deliver_comment(event(1))
+        await ws_comments.deliver_comment(event(3))
+        while "snapshot" not in websocket.sent:
+            await asyncio.sleep(0.01)
+        # Arrived after the snapshot that replaced it
+        await ws_comments.deliver_comment(event(2))
+        await ws_comments.deliver_comment(event(4))
+        await asyncio.sleep(0.01)
+        connection.close()
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert websocket.sent == [event(1), "snapshot", event(4)]
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import bindparam, update
+from sqlmodel import Session
+from models.user import User
+from db.database import engine
+from utils.metrics import metrics
+
+
+# Write-behind buffer for users.last_login and users.last_seen.
+# Logins and authenticated requests only record a timestamp in memory; the
+# latest value per user is written in one batched UPDATE every
+# ACTIVITY_FLUSH_SECONDS and once more on shutdown.
+ACTIVITY_FLUSH_SECONDS = float(os.getenv("ACTIVITY_FLUSH_SECONDS", "5"))
+
+users = User.__table__
+
+
+class ActivityBuffer:
+    def __init__(self, flush_interval: float = ACTIVITY_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_login: Dict[str, datetime] = {}
+        self._last_seen: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record_login(self, user_id: str, at: Optional[datetime] = None):
+        at = at or datetime.now()
+        with self._lock:
+            self._last_login[user_id] = at
+            self._last_seen[user_id] = at
+
+    def record_seen(self, user_id: str, at: Optional[datetime] = None):
+        at = at or datetime.now()
+        with self._lock:
+            self._last_seen[user_id] = at
+
+    # Write everything buffered so far. Returns the number of rows updated.
+    def flush(self) -> int:
+        with self._lock:
+            last_login, self._last_login = self._last_login, {}
+            last_seen, self._last_seen = self._last_seen, {}
+        if not last_seen:
+            return 0
+
+        try:
+            with Session(engine) as session:
+                if last_login:
+                    session.execute(
+                        update(users)
+                        .where(users.c.user_id == bindparam("uid"))
+                        .values(last_login=bindparam("at")),
+                        [{"uid": user_id, "at": at} for user_id, at in last_login.items()],
+                    )
+                session.execute(
+                    update(users)
+                    .where(users.c.user_id == bindparam("uid"))
+                    .values(last_seen=bindparam("at")),
+                    [{"uid": user_id, "at": at} for user_id, at in last_seen.items()],
+                )
+                session.commit()
+        except Exception:
+            # Put the values back (unless newer ones arrived) for the next flush
+            with self._lock:
+                for pending, failed in ((self._last_login, last_login), (self._last_seen, last_seen)):
+                    for user_id, at in failed.items():
+                        pending.setdefault(user_id, at)
+            metrics.inc("activity.flush_errors")
+            raise
+
+        metrics.inc("activity.rows_flushed", len(last_seen))
+        return len(last_seen)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Shutdown must go on even if the database is unreachable
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception as e:
+            print(f"[ActivityBuffer Error] final flush: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"[ActivityBuffer Error] {e}")
+
+
+activity_buffer = ActivityBuffer()
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, make_transient_to_detached, object_session
+from models.user import User
+from utils.backplane import backplane
+from utils.metrics import metrics
+
+
+# In-process cache of verified access token -> user principal, so an
+# authenticated request needs neither a JWT decode nor a users query.
+# Entries live for at most AUTH_CACHE_TTL_SECONDS (and never past the token's
+# own expiry); a user's entries are dropped on every replica when the user row
+# changes (profile update, password change, deactivation).
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+PRINCIPALS_CHANNEL = "principals"
+# Key in Session.info collecting users changed in the current transaction
+CHANGED_USERS_KEY = "changed_users"
+
+
+class PrincipalCache:
+    """TTL + LRU map of token -> User column values, indexed by user id."""
+
+    def __init__(self, ttl: float = AUTH_CACHE_TTL, max_size: int = AUTH_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._hits = 0
+        self._misses = 0
+        # Bumped on every invalidation; see put()
+        self.version = 0
+
+    # A fresh, detached User for the token, or None. Callers may modify it
+    # and session.add() it like a user loaded from the database.
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[0] <= time.time():
+                self._drop(token)
+                entry = None
+            if entry is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._entries.move_to_end(token)
+            hit_rate = self._hits / (self._hits + self._misses)
+        metrics.inc("auth.principal_cache.misses" if entry is None else "auth.principal_cache.hits")
+        metrics.set("auth.principal_cache.hit_rate", hit_rate)
+        if entry is None:
+            return None
+        user = User(**entry[1])
+        make_transient_to_detached(user)
+        return user
+
+    # `version` is the cache version read before the user was loaded; if an
+    # invalidation happened since, the row may be stale and is not cached.
+    def put(self, token: str, user: User, token_expires_at: float, version: int):
+        values = {column: getattr(user, column) for column in User.__table__.columns.keys()}
+        expires_at = min(time.time() + self.ttl, token_expires_at)
+        with self._lock:
+            if version != self.version:
+                return
+            self._drop(token)
+            self._entries[token] = (expires_at, values)
+            self._tokens_by_user.setdefault(user.user_id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+            metrics.set("auth.principal_cache.size", len(self._entries))
+
+    # Forget a user's principals in this process only
+    def forget_user(self, user_id: str):
+        with self._lock:
+            self.version += 1
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+            metrics.set("auth.principal_cache.size", len(self._entries))
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]["user_id"]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+principal_cache = PrincipalCache()
+
+
+# Drop a user's cached principals on every replica. Called automatically when
+# a User row is updated through the ORM; call it directly after bulk UPDATEs.
+def invalidate_user(user_id: str):
+    principal_cache.forget_user(user_id)
+    backplane.publish_threadsafe(PRINCIPALS_CHANNEL, user_id)
+
+
+async def _forget_remote_user(user_id: str):
+    principal_cache.forget_user(user_id)
+
+
+backplane.subscribe(PRINCIPALS_CHANNEL, _forget_remote_user)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _stage_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_USERS_KEY, set()).add(target.user_id)
+
+
+# Invalidate once the change is visible, so a concurrent request cannot
+# re-cache the old row after the invalidation
+@event.listens_for(SASession, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop(CHANGED_USERS_KEY, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop(CHANGED_USERS_KEY, None)
@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import and_, event, inspect, select
+from sqlalchemy.orm import Session as SASession, object_session
+from models.project import Project, ProjectMember
+from utils.backplane import backplane
+from utils.metrics import metrics
+
+
+# Answers "how does user U relate to project P": whether P exists, whether U
+# is its owner (Project.owner_id) and U's ProjectMember role, if any.
+# Ownership and membership are kept apart on purpose: a member with role
+# "owner" is not the project owner, and an owner without a ProjectMember row
+# is not a member.
+# Lookups are memoised for the lifetime of the request's session and cached
+# across requests for AUTHZ_CACHE_TTL_SECONDS; membership and ownership changes
+# drop the affected entries on every replica once they are committed.
+AUTHZ_CACHE_TTL = float(os.getenv("AUTHZ_CACHE_TTL_SECONDS", "30"))
+AUTHZ_CACHE_SIZE = int(os.getenv("AUTHZ_CACHE_SIZE", "50000"))
+
+PROJECT_ACCESS_CHANNEL = "project_access"
+# Keys in Session.info: the per-request memo, and the (project, user) pairs
+# changed in the current transaction (user None = every user of the project)
+ACCESS_MEMO_KEY = "project_access"
+CHANGED_ACCESS_KEY = "changed_project_access"
+
+
+class ProjectAccess(NamedTuple):
+    exists: bool
+    is_owner: bool
+    member_role: Optional[str]
+
+
+NO_PROJECT = ProjectAccess(exists=False, is_owner=False, member_role=None)
+
+
+class ProjectAccessCache:
+    """TTL + LRU map of (project_id, user_id) -> ProjectAccess, outsiders included."""
+
+    def __init__(self, ttl: float = AUTHZ_CACHE_TTL, max_size: int = AUTHZ_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, ProjectAccess]]" = OrderedDict()
+        self._users_by_project: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation; see put()
+        self.version = 0
+
+    # Cached access, or None on a miss
+    def get(self, project_id: str, user_id: str) -> Optional[ProjectAccess]:
+        key = (project_id, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                self._drop(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics.inc("authz.access_cache.misses" if entry is None else "authz.access_cache.hits")
+        return None if entry is None else entry[1]
+
+    # `version` is the cache version read before the access was loaded; if an
+    # invalidation happened since, it may be stale and is not cached.
+    def put(self, project_id: str, user_id: str, access: ProjectAccess, version: int):
+        key = (project_id, user_id)
+        with self._lock:
+            if version != self.version:
+                return
+            self._drop(key)
+            self._entries[key] = (time.time() + self.ttl, access)
+            self._users_by_project.setdefault(project_id, set()).add(user_id)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+            metrics.set("authz.access_cache.size", len(self._entries))
+
+    # Forget one user's access to a project, or everyone's, in this process only
+    def forget(self, project_id: str, user_id: Optional[str] = None):
+        with self._lock:
+            self.version += 1
+            if user_id is None:
+                user_ids = list(self._users_by_project.get(project_id, ()))
+            else:
+                user_ids = [user_id]
+            for uid in user_ids:
+                self._drop((project_id, uid))
+            metrics.set("authz.access_cache.size", len(self._entries))
+
+    def _drop(self, key: Tuple[str, str]):
+        if self._entries.pop(key, None) is None:
+            return
+        project_id, user_id = key
+        users = self._users_by_project.get(project_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self._users_by_project[project_id]
+
+
+access_cache = ProjectAccessCache()
+
+
+# One query for existence, ownership and membership
+def _load_project_access(session: SASession, project_id: str, user_id: str) -> ProjectAccess:
+    row = session.execute(
+        select(Project.owner_id, ProjectMember.role)
+        .outerjoin(
+            ProjectMember,
+            and_(ProjectMember.project_id == Project.id, ProjectMember.user_id == user_id),
+        )
+        .where(Project.id == project_id)
+    ).first()
+    if row is None:
+        return NO_PROJECT
+    owner_id, member_role = row
+    return ProjectAccess(exists=True, is_owner=owner_id == user_id, member_role=member_role)
+
+
+def project_access(session: SASession, project_id: Optional[str], user_id: str) -> ProjectAccess:
+    if not project_id or not user_id:
+        return NO_PROJECT
+    key = (project_id, user_id)
+    memo = session.info.setdefault(ACCESS_MEMO_KEY, {})
+    if key in memo:
+        return memo[key]
+
+    access = access_cache.get(project_id, user_id)
+    if access is None:
+        version = access_cache.version
+        access = _load_project_access(session, project_id, user_id)
+        # Membership changes flushed but not committed by this session are
+        # visible to it only; keep them out of the shared cache
+        if not session.info.get(CHANGED_ACCESS_KEY):
+            access_cache.put(project_id, user_id, access, version)
+    memo[key] = access
+    return access
+
+
+# Project.owner_id == user_id
+def is_project_owner(session: SASession, project_id: Optional[str], user_id: str) -> bool:
+    return project_access(session, project_id, user_id).is_owner
+
+
+# The user has a ProjectMember row in the project
+def is_project_member(session: SASession, project_id: Optional[str], user_id: str) -> bool:
+    return project_access(session, project_id, user_id).member_role is not None
+
+
+# Drop cached access on every replica. Called automatically when a Project or
+# ProjectMember row changes through the ORM; call it directly after bulk
+# UPDATE/DELETE statements.
+def invalidate_project_access(project_id: str, user_id: Optional[str] = None):
+    access_cache.forget(project_id, user_id)
+    backplane.publish_threadsafe(PROJECT_ACCESS_CHANNEL, f"{project_id}:{user_id or ''}")
+
+
+async def _forget_remote_access(message: str):
+    project_id, _, user_id = message.partition(":")
+    access_cache.forget(project_id, user_id or None)
+
+
+backplane.subscribe(PROJECT_ACCESS_CHANNEL, _forget_remote_access)
+
+
+def _stage(target, project_id: str, user_id: Optional[str]):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_ACCESS_KEY, set()).add((project_id, user_id))
+
+
+@event.listens_for(ProjectMember, "after_insert")
+@event.listens_for(ProjectMember, "after_update")
+@event.listens_for(ProjectMember, "after_delete")
+def _stage_changed_member(mapper, connection, target):
+    _stage(target, target.project_id, target.user_id)
+
+
+@event.listens_for(Project, "after_update")
+def _stage_changed_owner(mapper, connection, target):
+    if inspect(target).attrs.owner_id.history.has_changes():
+        _stage(target, target.id, None)
+
+
+@event.listens_for(Project, "after_insert")
+@event.listens_for(Project, "after_delete")
+def _stage_created_or_deleted_project(mapper, connection, target):
+    _stage(target, target.id, None)
+
+
+# Invalidate once the change is visible, so a concurrent request cannot
+# re-cache the old access after the invalidation
+@event.listens_for(SASession, "after_commit")
+def _invalidate_changed_access(session):
+    changed = session.info.pop(CHANGED_ACCESS_KEY, None)
+    if changed:
+        session.info.pop(ACCESS_MEMO_KEY, None)
+        for project_id, user_id in changed:
+            invalidate_project_access(project_id, user_id)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_changed_access(session):
+    session.info.pop(CHANGED_ACCESS_KEY, None)
+    session.info.pop(ACCESS_MEMO_KEY, None)
@@ -0,0 +1,228 @@
+import asyncio
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+from db.database import engine
+from utils.metrics import metrics
+
+
+# Pub/sub between workers and replicas for real-time events.
+# Every process subscribes to the channels it serves and forwards received
+# messages to its own WebSocket connections; publishing from any process
+# therefore reaches viewers connected to all of them.
+
+Handler = Callable[[str], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Base class: subscriptions, lifecycle and thread-safe publishing."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        self._loop = None
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        """Deliver `message` to the subscribers of `channel` in every process."""
+
+    # Publish from a worker thread (e.g. an after_commit hook or a scheduler job)
+    def publish_threadsafe(self, channel: str, message: str):
+        if self._loop is None or self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.publish(channel, message), self._loop)
+
+    async def _deliver(self, channel: str, message: str):
+        for handler in self._handlers.get(channel, ()):
+            try:
+                await handler(message)
+            except Exception as e:
+                print(f"[Backplane Error] {channel}: {e}")
+
+
+class InMemoryBackplane(Backplane):
+    """Delivers to subscribers in this process only (single worker, tests)."""
+
+    async def publish(self, channel: str, message: str):
+        await self._deliver(channel, message)
+
+
+# NOTIFY payloads are limited to 8000 bytes; larger messages are split into
+# chunks of the form "<message id>:<index>:<total>:<data>" and reassembled.
+# The size is in characters, so it leaves room for 4-byte UTF-8 sequences.
+PG_CHUNK_SIZE = 1900
+# Chunks of a message whose other chunks never arrive are dropped after this
+BACKPLANE_CHUNK_TTL = float(os.getenv("BACKPLANE_CHUNK_TTL_SECONDS", "30"))
+# Backoff between attempts to re-establish a lost LISTEN connection
+BACKPLANE_RECONNECT_MIN = float(os.getenv("BACKPLANE_RECONNECT_MIN_SECONDS", "1"))
+BACKPLANE_RECONNECT_MAX = float(os.getenv("BACKPLANE_RECONNECT_MAX_SECONDS", "30"))
+
+
+def split_message(message: str, chunk_size: int = PG_CHUNK_SIZE) -> List[str]:
+    message_id = uuid4().hex[:12]
+    parts = [message[i:i + chunk_size] for i in range(0, len(message), chunk_size)] or [""]
+    return [f"{message_id}:{index}:{len(parts)}:{part}" for index, part in enumerate(parts)]
+
+
+class ChunkAssembler:
+    def __init__(self, ttl: float = BACKPLANE_CHUNK_TTL):
+        self.ttl = ttl
+        # message id -> (first chunk arrival, chunks), oldest first
+        self._partial: "OrderedDict[str, Tuple[float, Dict[int, str]]]" = OrderedDict()
+
+    # Returns the full message once its last chunk has arrived, else None
+    def add(self, chunk: str) -> Optional[str]:
+        message_id, index, total, data = chunk.split(":", 3)
+        index, total = int(index), int(total)
+        if total == 1:
+            return data
+        now = time.monotonic()
+        self._evict(now)
+        _, parts = self._partial.setdefault(message_id, (now, {}))
+        parts[index] = data
+        if len(parts) < total:
+            return None
+        del self._partial[message_id]
+        return "".join(parts[i] for i in range(total))
+
+    def _evict(self, now: float):
+        while self._partial:
+            message_id, (first_seen, _) = next(iter(self._partial.items()))
+            if now - first_seen < self.ttl:
+                break
+            del self._partial[message_id]
+            metrics.inc("backplane.chunks_expired")
+
+
+class PostgresBackplane(Backplane):
+    """Backplane over Postgres LISTEN/NOTIFY, using the application database."""
+
+    CHANNEL_PREFIX = "devtask_"
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self._dsn = dsn
+        self._listen_conn = None
+        self._listen_fd: Optional[int] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._assembler = ChunkAssembler()
+
+    def _connect(self):
+        import psycopg2
+
+        # Keepalives make a silently dropped connection fail instead of hang
+        conn = psycopg2.connect(
+            self._dsn, keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3
+        )
+        conn.autocommit = True
+        return conn
+
+    async def start(self):
+        await super().start()
+        await self._listen()
+
+    async def stop(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._close_listen_conn()
+        if self._publish_conn is not None:
+            self._publish_conn.close()
+            self._publish_conn = None
+        await super().stop()
+
+    async def _listen(self):
+        conn = await asyncio.to_thread(self._connect)
+        with conn.cursor() as cursor:
+            for channel in self._handlers:
+                cursor.execute(f'LISTEN "{self.CHANNEL_PREFIX}{channel}"')
+        self._listen_conn = conn
+        self._listen_fd = conn.fileno()
+        self._loop.add_reader(self._listen_fd, self._on_readable)
+        metrics.set("backplane.connected", 1)
+
+    def _close_listen_conn(self):
+        if self._listen_conn is None:
+            return
+        self._loop.remove_reader(self._listen_fd)
+        try:
+            self._listen_conn.close()
+        except Exception:
+            pass
+        self._listen_conn = None
+        self._listen_fd = None
+        metrics.set("backplane.connected", 0)
+
+    # The LISTEN connection is gone (database restart, network failure):
+    # reconnect with exponential backoff. Messages published meanwhile are
+    # lost; the sockets' replay on reconnect covers them.
+    async def _reconnect(self):
+        delay = BACKPLANE_RECONNECT_MIN
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+                metrics.inc("backplane.reconnects")
+                self._reconnect_task = None
+                return
+            except Exception as e:
+                metrics.inc("backplane.reconnect_errors")
+                print(f"[Backplane Error] reconnect: {e}")
+                delay = min(delay * 2, BACKPLANE_RECONNECT_MAX)
+
+    def _on_readable(self):
+        try:
+            self._listen_conn.poll()
+        except Exception as e:
+            metrics.inc("backplane.disconnects")
+            print(f"[Backplane Error] connection lost: {e}")
+            self._close_listen_conn()
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+            return
+        while self._listen_conn.notifies:
+            notify = self._listen_conn.notifies.pop(0)
+            message = self._assembler.add(notify.payload)
+            if message is not None:
+                channel = notify.channel[len(self.CHANNEL_PREFIX):]
+                self._loop.create_task(self._deliver(channel, message))
+
+    def _notify(self, channel: str, message: str):
+        with self._publish_lock:
+            if self._publish_conn is None or self._publish_conn.closed:
+                self._publish_conn = self._connect()
+            with self._publish_conn.cursor() as cursor:
+                for chunk in split_message(message):
+                    cursor.execute(
+                        "SELECT pg_notify(%s, %s)", (f"{self.CHANNEL_PREFIX}{channel}", chunk)
+                    )
+
+    async def publish(self, channel: str, message: str):
+        await asyncio.to_thread(self._notify, channel, message)
+
+
+# BACKPLANE=memory|postgres; defaults to postgres when the database is Postgres
+def create_backplane() -> Backplane:
+    kind = os.getenv("BACKPLANE") or (
+        "postgres" if engine.dialect.name == "postgresql" else "memory"
+    )
+    if kind == "postgres":
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        return PostgresBackplane(dsn)
+    return InMemoryBackplane()
+
+
+backplane = create_backplane()
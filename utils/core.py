@@ -1,9 +1,13 @@
+import os
 import secrets
 import string
-from typing import Optional
-from sqlmodel import Session
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+from sqlalchemy import insert, update
+from sqlmodel import Session, select
 from models.notification import Notification
-from schemas.notification import NotificationType
+from schemas.notification import NotificationCreate, NotificationType
 from models.task import Task
 
 
@@ -15,7 +19,138 @@ def generate_user_id():
     return "".join(secrets.choice(alphabet) for i in range(16))
 
 
-# This function creates a notification in the database.
+# Key in Session.info under which freshly inserted notification rows wait for
+# the transaction to commit before being pushed to connected clients.
+NEW_NOTIFICATIONS_KEY = "new_notifications"
+
+
+# Same-type notifications for the same recipient and task arriving within this
+# window of the first one are merged into one unread row with a count
+# (0 disables coalescing).
+NOTIFICATION_COALESCE_WINDOW = timedelta(
+    minutes=int(os.getenv("NOTIFICATION_COALESCE_MINUTES", "30"))
+)
+COALESCED_TYPES = {NotificationType.COMMENT, NotificationType.COMMENT_REPLY}
+
+CoalesceKey = Tuple[str, str, NotificationType]
+
+
+def _coalesce_key(n: NotificationCreate) -> Optional[CoalesceKey]:
+    if not NOTIFICATION_COALESCE_WINDOW or n.type not in COALESCED_TYPES:
+        return None
+    if not n.related_task_id:
+        return None
+    return (n.recipient_user_id, n.related_task_id, n.type)
+
+
+# Recent unread notifications that new ones with the same key can merge into
+def _coalescible_notifications(
+    session: Session, keys: List[CoalesceKey], now: datetime
+) -> Dict[CoalesceKey, dict]:
+    if not keys:
+        return {}
+    candidates = session.exec(
+        select(Notification)
+        .where(
+            Notification.recipient_user_id.in_({k[0] for k in keys}),
+            Notification.related_task_id.in_({k[1] for k in keys}),
+            Notification.type.in_({k[2] for k in keys}),
+            Notification.is_read == False,  # noqa: E712
+            Notification.created_at >= now - NOTIFICATION_COALESCE_WINDOW,
+        )
+        .order_by(Notification.created_at)
+    ).all()
+    # Later rows win, so each key maps to its most recent notification
+    return {
+        (c.recipient_user_id, c.related_task_id, c.type): c.model_dump()
+        for c in candidates
+    }
+
+
+# This function inserts many notifications with a single executemany.
+# Notifications in COALESCED_TYPES are merged into a recent unread row for the
+# same recipient and task instead (count incremented, message and updated_at
+# bumped). The row keeps the first event's created_at, which places it in the
+# feed, bounds the coalescing window and ages it for retention.
+# It does not commit: the rows become part of the caller's transaction.
+def create_notifications_bulk(
+    session: Session,
+    notifications: List[NotificationCreate],
+) -> List[str]:
+    if not notifications:
+        return []
+
+    # Auto-resolve project_id once per task for entries that did not provide one
+    task_ids = {
+        n.related_task_id
+        for n in notifications
+        if n.related_task_id and not n.related_project_id
+    }
+    project_ids = {}
+    if task_ids:
+        project_ids = dict(
+            session.exec(
+                select(Task.id, Task.project_id).where(Task.id.in_(task_ids))
+            ).all()
+        )
+
+    now = datetime.now()
+    keys = [k for k in map(_coalesce_key, notifications) if k]
+    open_rows = _coalescible_notifications(session, keys, now)
+    existing_ids = {row["id"] for row in open_rows.values()}
+    inserted: List[dict] = []
+    merged: Dict[str, dict] = {}
+
+    for n in notifications:
+        key = _coalesce_key(n)
+        row = open_rows.get(key) if key else None
+        if row is not None:
+            row["count"] += 1
+            row["message"] = n.message
+            row["updated_at"] = now
+            if row["id"] in existing_ids:
+                merged[row["id"]] = row
+            continue
+
+        row = {
+            "id": uuid4().hex,
+            "recipient_user_id": n.recipient_user_id,
+            "message": n.message,
+            "type": n.type,
+            "related_task_id": n.related_task_id,
+            "related_project_id": n.related_project_id
+            or project_ids.get(n.related_task_id),
+            "is_read": False,
+            "count": 1,
+            "created_at": now,
+            "updated_at": now,
+        }
+        inserted.append(row)
+        if key:
+            open_rows[key] = row
+
+    if inserted:
+        session.execute(insert(Notification), inserted)
+    if merged:
+        session.execute(
+            update(Notification),
+            [
+                {
+                    "id": row["id"],
+                    "count": row["count"],
+                    "message": row["message"],
+                    "updated_at": row["updated_at"],
+                }
+                for row in merged.values()
+            ],
+        )
+
+    touched = inserted + list(merged.values())
+    session.info.setdefault(NEW_NOTIFICATIONS_KEY, []).extend(touched)
+    return [row["id"] for row in touched]
+
+
+# This function creates a single notification in the database and commits it.
 def create_notification(
     session: Session,
     recipient_user_id: str,
@@ -25,23 +160,20 @@ def create_notification(
     project_id: Optional[str] = None,
 ):
     try:
-        # Auto-resolve project_id from task_id if not provided
-        if task_id and not project_id:
-            task = session.get(Task, task_id)
-            if task:
-                project_id = str(task.project_id) if task.project_id else None
-
-        notification = Notification(
-            recipient_user_id=recipient_user_id,
-            message=message,
-            type=notif_type,
-            related_task_id=task_id,
-            related_project_id=project_id,
+        [notification_id] = create_notifications_bulk(
+            session,
+            [
+                NotificationCreate(
+                    recipient_user_id=recipient_user_id,
+                    message=message,
+                    type=notif_type,
+                    related_task_id=task_id,
+                    related_project_id=project_id,
+                )
+            ],
         )
-        session.add(notification)
         session.commit()
-        session.refresh(notification)
-        return notification
+        return session.get(Notification, notification_id)
 
     except Exception as e:
         session.rollback()
@@ -0,0 +1,82 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict
+from uuid import uuid4
+from sqlalchemy import insert
+from sqlmodel import Session, select, delete
+from models.notification import Notification
+from schemas.notification import NotificationType
+from utils.core import COALESCED_TYPES, NEW_NOTIFICATIONS_KEY, NOTIFICATION_COALESCE_WINDOW
+from utils.metrics import metrics
+from db.database import engine
+
+
+# How often unread comment notifications are rolled up into a digest
+# (0 disables the digest job)
+NOTIFICATION_DIGEST_HOURS = int(os.getenv("NOTIFICATION_DIGEST_HOURS", "0"))
+
+
+# Background job: replace each user's unread comment notifications that are
+# past the coalescing window with a single DIGEST notification.
+# The digest counts exactly the rows it replaces (locked until commit) and is
+# pushed to connected clients after the commit, like any other notification.
+def build_notification_digests() -> int:
+    cutoff = datetime.now() - NOTIFICATION_COALESCE_WINDOW
+    try:
+        with Session(engine) as session:
+            pending = session.exec(
+                select(
+                    Notification.id,
+                    Notification.recipient_user_id,
+                    Notification.related_task_id,
+                    Notification.count,
+                )
+                .where(
+                    Notification.is_read == False,  # noqa: E712
+                    Notification.type.in_(COALESCED_TYPES),
+                    Notification.created_at < cutoff,
+                )
+                .with_for_update()
+            ).all()
+
+            by_user: Dict[str, list] = defaultdict(list)
+            for row in pending:
+                by_user[row.recipient_user_id].append(row)
+            groups = {user_id: rows for user_id, rows in by_user.items() if len(rows) > 1}
+            if not groups:
+                session.rollback()
+                return 0
+
+            now = datetime.now()
+            digests = []
+            for user_id, rows in groups.items():
+                events = sum(row.count for row in rows)
+                tasks = len({row.related_task_id for row in rows})
+                digests.append(
+                    {
+                        "id": uuid4().hex,
+                        "recipient_user_id": user_id,
+                        "message": f"You have {events} new comments across {tasks} tasks.",
+                        "type": NotificationType.DIGEST,
+                        "related_task_id": None,
+                        "related_project_id": None,
+                        "is_read": False,
+                        "count": events,
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+            folded_ids = [row.id for rows in groups.values() for row in rows]
+
+            session.execute(insert(Notification), digests)
+            session.exec(delete(Notification).where(Notification.id.in_(folded_ids)))
+            session.info.setdefault(NEW_NOTIFICATIONS_KEY, []).extend(digests)
+            session.commit()
+
+            metrics.inc("notifications.digests", len(digests))
+            return len(digests)
+    except Exception as e:
+        metrics.inc("notifications.digests.errors")
+        print(f"[NotificationDigest Error] {e}")
+        return 0
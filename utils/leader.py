@@ -0,0 +1,143 @@
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from functools import wraps
+from typing import Callable, Optional
+from uuid import uuid4
+from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, update, or_
+from models.lease import Lease
+from utils.metrics import metrics
+from db.database import engine
+
+
+# A holder that stops renewing loses the lease after LEASE_TTL; renewing every
+# LEASE_RENEW_INTERVAL keeps failover within LEASE_TTL + LEASE_RENEW_INTERVAL.
+LEASE_TTL = timedelta(seconds=int(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "30")))
+LEASE_RENEW_INTERVAL = int(os.getenv("SCHEDULER_LEASE_RENEW_SECONDS", "10"))
+
+
+class LeaderLease:
+    """
+    Leader election through a row in the `leases` table.
+    Works on any database: acquiring and renewing is a single conditional
+    UPDATE, so no advisory locks or dialect-specific features are needed.
+    """
+
+    # `on_acquired` is called (from renew) each time this process becomes
+    # leader, `on_lost` each time it stops being leader
+    def __init__(
+        self,
+        name: str,
+        on_acquired: Optional[Callable[[], None]] = None,
+        on_lost: Optional[Callable[[], None]] = None,
+    ):
+        self.name = name
+        self.on_acquired = on_acquired
+        self.on_lost = on_lost
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._expires_at = datetime.min
+        self._lock = threading.Lock()
+
+    def is_leader(self) -> bool:
+        return datetime.now() < self._expires_at
+
+    # Acquire the lease if it is free or expired, or extend it if we hold it.
+    def renew(self) -> bool:
+        with self._lock:
+            now = datetime.now()
+            expires_at = now + LEASE_TTL
+            try:
+                with Session(engine) as session:
+                    result = session.exec(
+                        update(Lease)
+                        .where(
+                            Lease.name == self.name,
+                            or_(Lease.holder == self.holder, Lease.expires_at < now),
+                        )
+                        .values(
+                            holder=self.holder,
+                            expires_at=expires_at,
+                            acquired_at=case(
+                                (Lease.holder == self.holder, Lease.acquired_at),
+                                else_=now,
+                            ),
+                        )
+                    )
+                    if result.rowcount == 0:
+                        lease = session.get(Lease, self.name)
+                        if lease is None:
+                            session.add(
+                                Lease(
+                                    name=self.name,
+                                    holder=self.holder,
+                                    acquired_at=now,
+                                    expires_at=expires_at,
+                                )
+                            )
+                        else:
+                            session.rollback()
+                            self._lost(lease.holder)
+                            return False
+                    session.commit()
+            except IntegrityError:
+                # Another process inserted the lease row first
+                self._lost(None)
+                return False
+            except Exception as e:
+                print(f"[LeaderLease Error] {e}")
+                self._lost(None)
+                return False
+
+            acquired = not self.is_leader()
+            if acquired:
+                metrics.inc("scheduler.lease.acquired", lease=self.name)
+            self._expires_at = expires_at
+            metrics.set("scheduler.lease.holder", self.holder, lease=self.name)
+            metrics.set("scheduler.lease.is_leader", 1, lease=self.name)
+            metrics.set("scheduler.lease.expires_at", expires_at.isoformat(), lease=self.name)
+        if acquired and self.on_acquired:
+            try:
+                self.on_acquired()
+            except Exception as e:
+                print(f"[LeaderLease Error] on_acquired: {e}")
+        return True
+
+    def _lost(self, current_holder):
+        was_held = self._expires_at != datetime.min
+        self._expires_at = datetime.min
+        metrics.set("scheduler.lease.is_leader", 0, lease=self.name)
+        if current_holder:
+            metrics.set("scheduler.lease.holder", current_holder, lease=self.name)
+        if was_held and self.on_lost:
+            try:
+                self.on_lost()
+            except Exception as e:
+                print(f"[LeaderLease Error] on_lost: {e}")
+
+    # Give the lease up on shutdown so another replica takes over immediately
+    def release(self):
+        with self._lock:
+            try:
+                with Session(engine) as session:
+                    session.exec(
+                        update(Lease)
+                        .where(Lease.name == self.name, Lease.holder == self.holder)
+                        .values(expires_at=datetime.now())
+                    )
+                    session.commit()
+            except Exception as e:
+                print(f"[LeaderLease Error] {e}")
+            self._lost(None)
+
+    # Decorator: run the wrapped job only while this process holds the lease
+    def leader_only(self, job):
+        @wraps(job)
+        def wrapper(*args, **kwargs):
+            if not self.is_leader():
+                return None
+            return job(*args, **kwargs)
+
+        return wrapper
@@ -0,0 +1,52 @@
+import re
+from typing import List
+from sqlalchemy import exists
+from sqlmodel import Session, select, or_
+from models.project import Project, ProjectMember
+from models.task import Task, TaskAssignment
+from models.user import User
+
+
+# Mentions are written as @<user_id> or @<email>, e.g. "thanks @jane@example.com"
+MENTION_PATTERN = re.compile(r"(?<![\w@])@([\w.+-]+(?:@[\w-]+(?:\.[\w-]+)+)?)")
+# Upper bound on the users notified by a single comment
+MAX_MENTIONS = 20
+
+
+# Handles mentioned in a comment, in order of first appearance
+def parse_mentions(content: str) -> List[str]:
+    handles = []
+    for match in MENTION_PATTERN.finditer(content):
+        handle = match.group(1).rstrip(".")
+        if handle and handle not in handles:
+            handles.append(handle)
+    return handles[:MAX_MENTIONS]
+
+
+# Resolve handles to the user ids of active users who can see `task` (its
+# owner, assignees and watchers, and the owner and members of its project),
+# with one query. Anyone else mentioned is ignored, so a comment cannot be
+# used to notify arbitrary users.
+def resolve_mentions(session: Session, handles: List[str], task: Task) -> List[str]:
+    if not handles:
+        return []
+    can_see_task = [
+        User.user_id == task.user_id,
+        exists().where(TaskAssignment.task_id == task.id, TaskAssignment.user_id == User.user_id),
+    ]
+    if task.project_id:
+        can_see_task += [
+            exists().where(Project.id == task.project_id, Project.owner_id == User.user_id),
+            exists().where(
+                ProjectMember.project_id == task.project_id, ProjectMember.user_id == User.user_id
+            ),
+        ]
+    return list(
+        session.exec(
+            select(User.user_id).where(
+                or_(User.user_id.in_(handles), User.email.in_(handles)),
+                User.is_active == True,  # noqa: E712
+                or_(*can_see_task),
+            )
+        ).all()
+    )
@@ -0,0 +1,55 @@
+import threading
+from typing import Dict, Tuple
+
+
+# Minimal in-process metrics registry, exposed as JSON at `GET /metrics`.
+# Names are dotted strings; optional labels become part of the key,
+# e.g. "ws.connections{group=task_id}". Labels must have a small, fixed set of
+# values; never label with user, task or other row ids.
+def _key(name: str, labels: dict) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, object] = {}
+        self._timings: Dict[str, Tuple[int, float, float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def remove(self, name: str, **labels):
+        with self._lock:
+            self._gauges.pop(_key(name, labels), None)
+
+    # Record a duration (seconds); keeps count, total and max
+    def observe(self, name: str, seconds: float, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            count, total, peak = self._timings.get(key, (0, 0.0, 0.0))
+            self._timings[key] = (count + 1, total + seconds, max(peak, seconds))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": {
+                    key: {"count": count, "avg": total / count, "max": peak}
+                    for key, (count, total, peak) in self._timings.items()
+                },
+            }
+
+
+metrics = Metrics()
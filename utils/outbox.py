@@ -0,0 +1,261 @@
+import asyncio
+import inspect
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlmodel import Session, select, update, delete
+from models.outbox import OutboxEvent
+from schemas.notification import NotificationCreate
+from utils.core import create_notifications_bulk
+from utils.metrics import metrics
+from db.database import engine
+
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+# How long an async handler may run before the event is retried
+OUTBOX_HANDLER_TIMEOUT = float(os.getenv("OUTBOX_HANDLER_TIMEOUT", "10"))
+# Claimed events stay invisible to other dispatchers: a batch for as long as
+# working through it could take if every handler timed out, plus this margin
+OUTBOX_CLAIM_MARGIN = timedelta(seconds=30)
+# Delivered events are kept for OUTBOX_RETENTION_DAYS, dead-lettered ones
+# (failed_at set) for OUTBOX_FAILED_RETENTION_DAYS so they can be inspected
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+OUTBOX_FAILED_RETENTION_DAYS = int(os.getenv("OUTBOX_FAILED_RETENTION_DAYS", "30"))
+OUTBOX_PURGE_BATCH_SIZE = int(os.getenv("OUTBOX_PURGE_BATCH_SIZE", "1000"))
+
+NOTIFICATIONS_CREATE = "notifications.create"
+
+# event_type -> handler.
+# Sync handlers are called as handler(session, payload) and run inside the
+# dispatcher's transaction; async handlers are called as handler(payload)
+# on the application's event loop.
+_handlers: Dict[str, Callable[..., Any]] = {}
+
+
+def register_handler(event_type: str, handler: Callable[..., Any]):
+    _handlers[event_type] = handler
+
+
+# Record an event in the caller's transaction. Nothing is delivered until
+# the caller commits and the dispatcher picks the row up.
+def enqueue_event(session: Session, event_type: str, payload: dict) -> OutboxEvent:
+    event = OutboxEvent(event_type=event_type, payload=payload)
+    session.add(event)
+    return event
+
+
+# Queue a batch of notifications as a single outbox event.
+def enqueue_notifications(session: Session, notifications: List[NotificationCreate]):
+    if not notifications:
+        return None
+    return enqueue_event(
+        session,
+        NOTIFICATIONS_CREATE,
+        {"notifications": [n.model_dump(mode="json") for n in notifications]},
+    )
+
+
+def _create_notifications(session: Session, payload: dict):
+    create_notifications_bulk(
+        session,
+        [NotificationCreate(**n) for n in payload.get("notifications", [])],
+    )
+
+
+register_handler(NOTIFICATIONS_CREATE, _create_notifications)
+
+
+# End of a claim long enough for `handler_runs` handlers to time out in turn
+def _claim_until(handler_runs: int) -> datetime:
+    return datetime.now() + handler_runs * timedelta(seconds=OUTBOX_HANDLER_TIMEOUT) + OUTBOX_CLAIM_MARGIN
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(2 ** attempts, 300))
+
+
+class OutboxDispatcher:
+    """Background task draining the outbox in batches with retries."""
+
+    def __init__(
+        self,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    # Ask the dispatcher to poll now instead of waiting for the next tick.
+    # Safe to call from request handlers running in the threadpool.
+    def wake(self):
+        if self._loop and self._wakeup and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await asyncio.to_thread(self.drain_once)
+            except Exception as e:
+                print(f"[OutboxDispatcher Error] {e}")
+                processed = 0
+
+            # A full batch means there is probably more waiting
+            if processed >= self.batch_size:
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    # Claim up to batch_size events. Returns their ids and the time the claim
+    # lasts until, which also identifies it (see _reclaim).
+    def _claim_batch(self, session: Session) -> Tuple[List[str], datetime]:
+        now = datetime.now()
+        claimed_until = _claim_until(self.batch_size)
+        event_ids = session.exec(
+            select(OutboxEvent.id)
+            .where(
+                OutboxEvent.dispatched_at.is_(None),
+                OutboxEvent.failed_at.is_(None),
+                OutboxEvent.available_at <= now,
+            )
+            .order_by(OutboxEvent.created_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if event_ids:
+            session.exec(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(event_ids))
+                .values(available_at=claimed_until)
+            )
+        session.commit()
+        return list(event_ids), claimed_until
+
+    # Renew the claim on one event right before handling it. Returns False if
+    # the batch claim lapsed and another dispatcher has taken the event over.
+    def _reclaim(self, session: Session, event_id: str, claimed_until: datetime) -> bool:
+        result = session.exec(
+            update(OutboxEvent)
+            .where(
+                OutboxEvent.id == event_id,
+                OutboxEvent.dispatched_at.is_(None),
+                OutboxEvent.failed_at.is_(None),
+                OutboxEvent.available_at == claimed_until,
+            )
+            .values(available_at=_claim_until(1))
+        )
+        session.commit()
+        return result.rowcount == 1
+
+    def _handle(self, session: Session, event: OutboxEvent):
+        handler = _handlers.get(event.event_type)
+        if handler is None:
+            raise ValueError(f"No outbox handler for '{event.event_type}'")
+
+        if inspect.iscoroutinefunction(handler):
+            if self._loop is None:
+                raise RuntimeError("Dispatcher has no event loop for async handlers")
+            future = asyncio.run_coroutine_threadsafe(handler(event.payload), self._loop)
+            try:
+                future.result(timeout=OUTBOX_HANDLER_TIMEOUT)
+            except TimeoutError:
+                # Goes through the usual retry / dead-letter path
+                future.cancel()
+                raise TimeoutError(
+                    f"Handler for '{event.event_type}' timed out after {OUTBOX_HANDLER_TIMEOUT}s"
+                )
+        else:
+            handler(session, event.payload)
+
+    # Claim and deliver one batch. Returns the number of events processed.
+    def drain_once(self) -> int:
+        with Session(engine) as session:
+            event_ids, claimed_until = self._claim_batch(session)
+
+            for event_id in event_ids:
+                if not self._reclaim(session, event_id, claimed_until):
+                    metrics.inc("outbox.claims_lost")
+                    continue
+                event = session.get(OutboxEvent, event_id)
+                try:
+                    self._handle(session, event)
+                    event.dispatched_at = datetime.now()
+                    session.add(event)
+                    session.commit()
+                except Exception as e:
+                    session.rollback()
+                    event = session.get(OutboxEvent, event_id)
+                    event.attempts += 1
+                    event.last_error = str(e)[:500]
+                    if event.attempts >= self.max_attempts:
+                        event.failed_at = datetime.now()
+                    else:
+                        event.available_at = datetime.now() + _retry_delay(event.attempts)
+                    session.add(event)
+                    session.commit()
+
+            return len(event_ids)
+
+
+outbox_dispatcher = OutboxDispatcher()
+
+
+# Delete one batch of events whose `column` (dispatched_at / failed_at) is
+# older than `cutoff`; both columns are indexed.
+def _purge_batch(session: Session, column, cutoff: datetime, batch_size: int) -> int:
+    batch_ids = session.exec(
+        select(OutboxEvent.id).where(column < cutoff).limit(batch_size)
+    ).all()
+    if batch_ids:
+        session.exec(delete(OutboxEvent).where(OutboxEvent.id.in_(batch_ids)))
+        session.commit()
+    return len(batch_ids)
+
+
+# Background job: drop delivered and dead-lettered events past retention
+def purge_outbox_events(batch_size: int = OUTBOX_PURGE_BATCH_SIZE) -> int:
+    now = datetime.now()
+    total = 0
+    try:
+        with Session(engine) as session:
+            for column, days in (
+                (OutboxEvent.dispatched_at, OUTBOX_RETENTION_DAYS),
+                (OutboxEvent.failed_at, OUTBOX_FAILED_RETENTION_DAYS),
+            ):
+                cutoff = now - timedelta(days=days)
+                while True:
+                    purged = _purge_batch(session, column, cutoff, batch_size)
+                    total += purged
+                    if purged < batch_size:
+                        break
+                    time.sleep(0.1)
+    except Exception as e:
+        metrics.inc("outbox.purge.errors")
+        print(f"[OutboxPurge Error] {e}")
+    metrics.inc("outbox.purged", total)
+    return total
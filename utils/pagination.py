@@ -0,0 +1,40 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+# Keyset pagination helpers.
+# A cursor is the (created_at, id) of the last row a client has seen,
+# encoded as an opaque url-safe string.
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+# Conditions selecting rows strictly after / before a cursor position,
+# in (created_at, id) order
+def keyset_after(created_at_column, id_column, cursor: str):
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_at_column > created_at,
+        and_(created_at_column == created_at, id_column > row_id),
+    )
+
+
+def keyset_before(created_at_column, id_column, cursor: str):
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < row_id),
+    )
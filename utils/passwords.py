@@ -0,0 +1,105 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from utils.metrics import metrics
+
+
+# Password hashing runs in a dedicated process pool so bcrypt neither holds the
+# GIL nor ties up the threadpool that serves sync routes.
+# BCRYPT_ROUNDS is the cost factor; hashes made with another cost are
+# transparently re-hashed the next time their user logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hash/verify calls allowed to wait for a worker before new ones are refused
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+# Workers must not be forked from this process: it runs threads (event loop,
+# scheduler, outbox dispatcher) whose locks a fork could copy mid-update
+PASSWORD_HASH_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+
+# Worker-side functions; they return when they started so the caller can
+# measure how long the job waited in the queue.
+def _hash(password: str) -> Tuple[float, str]:
+    return time.time(), pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[float, Tuple[bool, Optional[str]]]:
+    return time.time(), pwd_context.verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """Bounded process pool for bcrypt, created on first use."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._pending.acquire(blocking=False):
+            metrics.inc("auth.password_hash.rejected")
+            raise HTTPException(
+                status_code=503,
+                detail="Too many concurrent sign-ins, please retry",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(PASSWORD_HASH_START_METHOD),
+                )
+        submitted_at = time.time()
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(lambda f: self._done(f, submitted_at))
+        return future
+
+    def _done(self, future: Future, submitted_at: float):
+        self._pending.release()
+        if not future.cancelled() and future.exception() is None:
+            started_at, _ = future.result()
+            metrics.observe("auth.password_hash.queue_wait", max(0.0, started_at - submitted_at))
+            metrics.observe("auth.password_hash.duration", time.time() - started_at)
+
+    async def hash(self, password: str) -> str:
+        _, hashed = await asyncio.wrap_future(self._submit(_hash, password))
+        return hashed
+
+    # Returns (valid, new_hash); new_hash is set when the stored hash should be
+    # replaced because the configured cost changed
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        _, result = await asyncio.wrap_future(self._submit(_verify_and_update, password, hashed))
+        return result
+
+    # Blocking variants for sync callers
+    def hash_sync(self, password: str) -> str:
+        return self._submit(_hash, password).result()[1]
+
+    def verify_sync(self, password: str, hashed: str) -> bool:
+        return self._submit(_verify_and_update, password, hashed).result()[1][0]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher()
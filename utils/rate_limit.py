@@ -0,0 +1,238 @@
+import ipaddress
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.security import OAuth2PasswordBearer
+from utils.metrics import metrics
+from utils.security import decode_access_token
+
+
+# Token-bucket rate limits per client and route class.
+# A client is the authenticated user (token subject) or, without a valid
+# token, the remote address. Each class allows bursts of up to N requests and
+# refills at N per period; override with RATE_LIMIT_<CLASS>="<N>/<seconds>".
+RATE_LIMIT_DEFAULTS = {
+    "default": "120/60",
+    "auth": "20/60",
+    "dashboard": "30/60",
+    "llm": "5/60",
+    # Failed logins per e-mail address from one client address
+    "login_email": "10/300",
+}
+# RATE_LIMIT_BACKEND=memory|redis; redis shares buckets between replicas
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Reverse proxies (addresses or networks, comma separated) whose
+# X-Forwarded-For header is trusted, e.g. "172.16.0.0/12"
+RATE_LIMIT_TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy.strip(), strict=False)
+    for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",")
+    if proxy.strip()
+]
+
+
+def _parse_limit(spec: str) -> Tuple[int, float]:
+    requests, seconds = spec.split("/")
+    return int(requests), float(seconds)
+
+
+RATE_LIMITS: Dict[str, Tuple[int, float]] = {
+    route_class: _parse_limit(os.getenv(f"RATE_LIMIT_{route_class.upper()}", spec))
+    for route_class, spec in RATE_LIMIT_DEFAULTS.items()
+}
+
+
+# Refill a bucket up to `now` and try to take `cost` tokens (0 only checks
+# that one is available).
+# Returns (tokens left, allowed, seconds until a token is available).
+def take_token(
+    tokens: float, updated_at: float, capacity: int, rate: float, now: float, cost: int = 1
+) -> Tuple[float, bool, float]:
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= 1:
+        return tokens - cost, True, 0.0
+    return tokens, False, (1 - tokens) / rate
+
+
+class InMemoryRateLimitStore:
+    """Buckets held in this process (per replica limits)."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(
+        self, key: str, capacity: int, rate: float, now: float, cost: int = 1
+    ) -> Tuple[float, bool, float]:
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens, allowed, retry_after = take_token(tokens, updated_at, capacity, rate, now, cost)
+            self._buckets[key] = (tokens, now)
+            # Least recently used buckets go first; they are the fullest anyway
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return tokens, allowed, retry_after
+
+
+class RedisRateLimitStore:
+    """Buckets shared by all replicas, updated atomically by a Lua script."""
+
+    SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    def take(
+        self, key: str, capacity: int, rate: float, now: float, cost: int = 1
+    ) -> Tuple[float, bool, float]:
+        allowed, tokens, retry_after = self.client.eval(
+            self.SCRIPT, 1, f"{self.prefix}{key}", capacity, rate, now, cost
+        )
+        return float(tokens), bool(int(allowed)), float(retry_after)
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    limit: int
+    period: float
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+    # IETF RateLimit header fields
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset_after)),
+            "RateLimit-Policy": f"{self.limit};w={int(self.period)}",
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class RateLimiter:
+    def __init__(self, store, limits: Dict[str, Tuple[int, float]] = RATE_LIMITS):
+        self.store = store
+        self.limits = limits
+
+    # `consume=False` checks the bucket without taking a token
+    def hit(self, route_class: str, client: str, consume: bool = True) -> Decision:
+        capacity, period = self.limits.get(route_class, self.limits["default"])
+        rate = capacity / period
+        try:
+            tokens, allowed, retry_after = self.store.take(
+                f"{route_class}:{client}", capacity, rate, time.time(), int(consume)
+            )
+        except Exception as e:
+            # A shared store outage must not take the API down with it
+            metrics.inc("rate_limit.store_errors")
+            print(f"[RateLimit Error] {e}")
+            tokens, allowed, retry_after = capacity - 1, True, 0.0
+        return Decision(
+            allowed=allowed,
+            limit=capacity,
+            period=period,
+            remaining=int(tokens),
+            retry_after=retry_after,
+            reset_after=(capacity - tokens) / rate,
+        )
+
+
+def create_rate_limiter() -> RateLimiter:
+    if RATE_LIMIT_BACKEND == "redis":
+        import redis
+
+        return RateLimiter(RedisRateLimitStore(redis.Redis.from_url(RATE_LIMIT_REDIS_URL)))
+    return RateLimiter(InMemoryRateLimitStore())
+
+
+rate_limiter = create_rate_limiter()
+
+_optional_token = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in RATE_LIMIT_TRUSTED_PROXIES)
+
+
+# Address of the client behind any trusted proxies: X-Forwarded-For is read
+# from the right (the hop our own proxy added) and the first address that is
+# not a trusted proxy is the client. Untrusted peers cannot spoof it.
+def client_address(request: Request) -> str:
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    forwarded = [
+        hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()
+    ]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return forwarded[0] if forwarded else host
+
+
+# Take a token for `client` in `route_class` (only check for one with
+# `consume=False`); raises 429 with Retry-After when the bucket is empty,
+# otherwise adds the RateLimit-* headers to `response`.
+def enforce_rate_limit(
+    route_class: str, client: str, response: Optional[Response] = None, consume: bool = True
+):
+    decision = rate_limiter.hit(route_class, client, consume)
+    if not decision.allowed:
+        metrics.inc("rate_limit.rejected", route_class=route_class)
+        raise HTTPException(
+            status_code=429, detail="Rate limit exceeded", headers=decision.headers()
+        )
+    if response is not None:
+        response.headers.update(decision.headers())
+
+
+# Route dependency: `dependencies=[Depends(rate_limit("dashboard"))]`
+# Adds RateLimit-* headers to the response, or fails with 429 and Retry-After.
+def rate_limit(route_class: str = "default"):
+    def check_rate_limit(
+        request: Request,
+        response: Response,
+        token: Optional[str] = Depends(_optional_token),
+    ):
+        payload = decode_access_token(token) if token else None
+        if payload and payload.get("sub"):
+            client = f"user:{payload['sub']}"
+        else:
+            client = f"ip:{client_address(request)}"
+        enforce_rate_limit(route_class, client, response)
+
+    return check_rate_limit
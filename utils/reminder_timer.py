@@ -0,0 +1,102 @@
+import heapq
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from utils.backplane import backplane
+from utils.metrics import metrics
+
+
+# Only the scheduler leader keeps a timer. Other processes forward due date
+# changes to it over this backplane channel (see utils.scheduler).
+REMINDERS_CHANNEL = "reminders"
+
+
+def _local_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+# The instants at which a task with this due date needs a reminder:
+# the day before (due tomorrow), the day itself (due today) and the
+# due time (overdue).
+def reminder_instants(due_date: datetime) -> List[datetime]:
+    due_day = due_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    return [due_day - timedelta(days=1), due_day, due_date]
+
+
+class ReminderTimer:
+    """
+    Min-heap of upcoming reminder instants, keyed by task.
+    Rescheduling a task does not search the heap: entries carry the due date
+    they were created for and are skipped when it no longer matches.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str, datetime]] = []
+        self._due: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self.seeded_at: Optional[datetime] = None
+
+    def schedule(self, task_id: str, due_date: Optional[datetime]):
+        if due_date is None:
+            self.cancel(task_id)
+            return
+
+        due_date = _local_naive(due_date)
+        now = datetime.now()
+        with self._lock:
+            if self._due.get(task_id) == due_date:
+                return
+            self._due[task_id] = due_date
+            # Instants already passed collapse into one entry firing right away
+            for fire_at in sorted({max(instant, now) for instant in reminder_instants(due_date)}):
+                heapq.heappush(self._heap, (fire_at, task_id, due_date))
+            metrics.set("reminders.timer.size", len(self._heap))
+
+    def cancel(self, task_id: str):
+        with self._lock:
+            self._due.pop(task_id, None)
+
+    # Remove and return the ids of tasks with a reminder instant at or before `now`
+    def pop_due(self, now: Optional[datetime] = None) -> List[str]:
+        now = now or datetime.now()
+        task_ids = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, task_id, due_date = heapq.heappop(self._heap)
+                if self._due.get(task_id) != due_date:
+                    continue  # stale entry from before a reschedule or cancel
+                if fire_at >= due_date:
+                    del self._due[task_id]  # last reminder for this due date
+                if task_id not in task_ids:
+                    task_ids.append(task_id)
+            metrics.set("reminders.timer.size", len(self._heap))
+        return task_ids
+
+    # Forget everything, e.g. when this process stops being the scheduler
+    # leader; the next seed reloads the timer from the database.
+    def clear(self):
+        with self._lock:
+            self._heap = []
+            self._due = {}
+            self.seeded_at = None
+            metrics.set("reminders.timer.size", 0)
+
+    def next_fire_at(self) -> Optional[datetime]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
+
+
+reminder_timer = ReminderTimer()
+
+
+# Reschedule a task's reminders after its due date changed; None cancels them.
+# Call after the change is committed.
+def reschedule_reminders(task_id: str, due_date: Optional[datetime]):
+    message = {"task_id": task_id, "due_date": due_date.isoformat() if due_date else None}
+    backplane.publish_threadsafe(REMINDERS_CHANNEL, json.dumps(message))
@@ -0,0 +1,90 @@
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert, literal
+from sqlmodel import Session, select, delete
+from models.notification import Notification, NotificationArchive
+from utils.metrics import metrics
+from db.database import engine
+
+
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "30"))
+# "archive" moves rows to notifications_archive, "delete" drops them
+NOTIFICATION_RETENTION_MODE = os.getenv("NOTIFICATION_RETENTION_MODE", "archive")
+NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", "500"))
+# Pause between batches so concurrent writers are never starved
+NOTIFICATION_RETENTION_PAUSE = float(os.getenv("NOTIFICATION_RETENTION_PAUSE", "0.1"))
+
+_ARCHIVED_COLUMNS = [
+    "id",
+    "recipient_user_id",
+    "message",
+    "related_task_id",
+    "related_project_id",
+    "type",
+    "is_read",
+    "count",
+    "created_at",
+]
+
+
+# Move (or delete) one batch of read notifications older than `cutoff`.
+# Each batch is its own short transaction. Returns the number of rows handled.
+def _retain_batch(session: Session, cutoff: datetime, batch_size: int, mode: str) -> int:
+    batch_ids = session.exec(
+        select(Notification.id)
+        .where(Notification.is_read == True, Notification.created_at < cutoff)  # noqa: E712
+        .order_by(Notification.created_at)
+        .limit(batch_size)
+    ).all()
+    if not batch_ids:
+        return 0
+
+    if mode == "archive":
+        session.exec(
+            insert(NotificationArchive).from_select(
+                _ARCHIVED_COLUMNS + ["archived_at"],
+                select(
+                    *[getattr(Notification, column) for column in _ARCHIVED_COLUMNS],
+                    literal(datetime.now()),
+                ).where(Notification.id.in_(batch_ids)),
+            )
+        )
+    session.exec(delete(Notification).where(Notification.id.in_(batch_ids)))
+    session.commit()
+    return len(batch_ids)
+
+
+# Background job: keep the notifications table limited to recent or unread rows
+def run_notification_retention(
+    max_age_days: int = NOTIFICATION_RETENTION_DAYS,
+    mode: str = NOTIFICATION_RETENTION_MODE,
+    batch_size: int = NOTIFICATION_RETENTION_BATCH_SIZE,
+) -> int:
+    if mode not in ("archive", "delete"):
+        raise ValueError(f"Unknown notification retention mode '{mode}'")
+
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    started = time.monotonic()
+    total = 0
+    try:
+        with Session(engine) as session:
+            while True:
+                handled = _retain_batch(session, cutoff, batch_size, mode)
+                if not handled:
+                    break
+                total += handled
+                metrics.inc(f"notifications.retention.{mode}d", handled)
+                metrics.inc("notifications.retention.batches")
+                metrics.set("notifications.retention.current_run_rows", total)
+                if handled < batch_size:
+                    break
+                time.sleep(NOTIFICATION_RETENTION_PAUSE)
+    except Exception as e:
+        metrics.inc("notifications.retention.errors")
+        print(f"[NotificationRetention Error] {e}")
+    finally:
+        metrics.set("notifications.retention.last_run_at", datetime.now().isoformat())
+        metrics.set("notifications.retention.last_run_rows", total)
+        metrics.observe("notifications.retention.duration", time.monotonic() - started)
+    return total
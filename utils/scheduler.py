@@ -1,59 +1,349 @@
+import json
+import os
 from apscheduler.schedulers.background import BackgroundScheduler
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from sqlmodel import Session, select
-from models.task import Task
-from models.notification import NotificationType
-from utils.core import create_notification
+from typing import List, Optional, Tuple
+from sqlalchemy import case, exists, insert
+from sqlmodel import Session, select, func
+from models.task import Task, TaskAssignment
+from models.reminder import ReminderLedger
+from models.checkpoint import JobCheckpoint
+from schemas.notification import NotificationCreate, NotificationType
+from utils.core import create_notifications_bulk
+from utils.retention import run_notification_retention
+from utils.outbox import purge_outbox_events
+from utils.digest import build_notification_digests, NOTIFICATION_DIGEST_HOURS
+from utils.metrics import metrics
+from utils.leader import LeaderLease, LEASE_RENEW_INTERVAL
+from utils.reminder_timer import reminder_timer, REMINDERS_CHANNEL
+from utils.backplane import backplane
 from db.database import engine
 
 
-# Background job to check task due dates and notify assignees
-def check_due_dates():
+REMINDER_MESSAGES = {
+    "due_tomorrow": "Reminder: Task '{title}' is due tomorrow.",
+    "due_today": "Task '{title}' is due today!",
+    "overdue": "Task '{title}' is overdue!",
+}
+
+# The reminder scan is split into REMINDER_SHARDS ranges of the (random, hex)
+# task id space and processed by up to REMINDER_WORKERS threads.
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", "16"))
+REMINDER_WORKERS = int(os.getenv("REMINDER_WORKERS", "4"))
+REMINDER_JOB = "check_due_dates"
+# Local hour of the daily sweep
+REMINDER_SWEEP_HOUR = int(os.getenv("REMINDER_SWEEP_HOUR", "3"))
+
+# Precise reminders: the timer holds instants up to REMINDER_TIMER_HORIZON ahead
+# and is checked every REMINDER_TICK_SECONDS.
+REMINDER_TICK_SECONDS = int(os.getenv("REMINDER_TICK_SECONDS", "30"))
+REMINDER_TIMER_HORIZON = timedelta(days=3)
+REMINDER_RESEED_INTERVAL = timedelta(minutes=int(os.getenv("REMINDER_RESEED_MINUTES", "10")))
+
+
+# Task id range [lower, upper) for a shard; upper is None for the last shard
+def _shard_bounds(shard: int, shards: int) -> Tuple[str, Optional[str]]:
+    def boundary(i):
+        return format(i * 0x10000 // shards, "04x")
+
+    upper = boundary(shard + 1) if shard + 1 < shards else None
+    return boundary(shard), upper
+
+
+# Send every reminder that is due at `now` for tasks matching `conditions`.
+# One indexed query selects every (task, assignee) pair that is due tomorrow,
+# due today or overdue and has no matching row in the reminder ledger yet.
+# Ledger rows and notifications are added to the session; the caller commits.
+def _send_reminders(session: Session, now: datetime, *conditions) -> int:
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    tomorrow = today + timedelta(days=1)
+    day_after_tomorrow = today + timedelta(days=2)
+
+    reminder_kind = case(
+        (Task.due_date <= now, "overdue"),
+        (Task.due_date < tomorrow, "due_today"),
+        else_="due_tomorrow",
+    )
+    already_sent = exists().where(
+        ReminderLedger.task_id == Task.id,
+        ReminderLedger.user_id == TaskAssignment.user_id,
+        ReminderLedger.reminder_kind == reminder_kind,
+        ReminderLedger.reminder_date == func.date(Task.due_date),
+    )
+
+    due = session.exec(
+        select(
+            Task.id,
+            Task.title,
+            Task.due_date,
+            Task.project_id,
+            TaskAssignment.user_id,
+            reminder_kind,
+        )
+        .join(TaskAssignment, TaskAssignment.task_id == Task.id)
+        .where(
+            *conditions,
+            Task.due_date.is_not(None),
+            Task.due_date < day_after_tomorrow,
+            Task.is_completed == False,  # noqa: E712
+            ~already_sent,
+        )
+    ).all()
+    if not due:
+        return 0
+
+    sent_at = datetime.now()
+    session.execute(
+        insert(ReminderLedger),
+        [
+            {
+                "task_id": task_id,
+                "user_id": user_id,
+                "reminder_kind": kind,
+                "reminder_date": due_date.date(),
+                "sent_at": sent_at,
+            }
+            for task_id, _, due_date, _, user_id, kind in due
+        ],
+    )
+    create_notifications_bulk(
+        session,
+        [
+            NotificationCreate(
+                recipient_user_id=user_id,
+                message=REMINDER_MESSAGES[kind].format(title=title),
+                related_task_id=task_id,
+                related_project_id=project_id,
+                type=NotificationType.GENERAL,
+            )
+            for task_id, title, _, project_id, user_id, kind in due
+        ],
+    )
+    metrics.inc("reminders.sent", len(due))
+    return len(due)
+
+
+# Send the reminders for one shard of tasks.
+# Ledger rows, notifications and the shard checkpoint commit together.
+def _remind_shard(shard: int, shards: int, now: datetime, run_key: str) -> int:
+    lower, upper = _shard_bounds(shard, shards)
+    in_shard = [Task.id >= lower]
+    if upper is not None:
+        in_shard.append(Task.id < upper)
+
+    with Session(engine) as session:
+        sent = _send_reminders(session, now, *in_shard)
+        session.add(
+            JobCheckpoint(
+                job_name=REMINDER_JOB, run_key=run_key, shard=shard, processed=sent
+            )
+        )
+        session.commit()
+
+    metrics.inc("reminders.shards_completed")
+    return sent
+
+
+# Send the reminders that are due now for specific tasks (used by the timer)
+def send_task_reminders(task_ids: List[str]) -> int:
+    if not task_ids:
+        return 0
+    with Session(engine) as session:
+        sent = _send_reminders(session, datetime.now(), Task.id.in_(task_ids))
+        session.commit()
+    return sent
+
+
+# Load upcoming reminder instants into the timer with a windowed, indexed
+# query on tasks.due_date (never a full scan).
+def seed_reminder_timer():
+    now = datetime.now()
+    with Session(engine) as session:
+        upcoming = session.exec(
+            select(Task.id, Task.due_date).where(
+                Task.due_date.is_not(None),
+                Task.due_date > now,
+                Task.due_date < now + REMINDER_TIMER_HORIZON,
+                Task.is_completed == False,  # noqa: E712
+            )
+        ).all()
+    for task_id, due_date in upcoming:
+        reminder_timer.schedule(task_id, due_date)
+    reminder_timer.seeded_at = now
+
+
+# Every REMINDER_TICK_SECONDS: fire reminders whose instant has passed.
+# Due date changes reach the timer over the backplane; the periodic re-seed
+# catches any that were lost in transit.
+def fire_due_reminders():
+    try:
+        now = datetime.now()
+        if reminder_timer.seeded_at is None or now - reminder_timer.seeded_at > REMINDER_RESEED_INTERVAL:
+            seed_reminder_timer()
+        send_task_reminders(reminder_timer.pop_due(now))
+    except Exception as e:
+        metrics.inc("reminders.errors")
+        print(f"[ReminderTimer Error] {e}")
+
+
+# A run writes this pseudo-shard checkpoint when it starts, so a run that was
+# interrupted before finishing any shard can still be found and resumed.
+RUN_STARTED_SHARD = -1
+# Runs younger than this are resumed if they did not complete
+REMINDER_RESUME_WINDOW = timedelta(hours=24)
+
+
+def _run_key(day, shards: int) -> str:
+    return f"{day.isoformat()}/{shards}"
+
+
+def _run_shards(run_key: str) -> int:
+    return int(run_key.rsplit("/", 1)[1])
+
+
+# Started runs of the last REMINDER_RESUME_WINDOW with shards still missing,
+# oldest first
+def _incomplete_reminder_runs(now: datetime) -> List[str]:
+    with Session(engine) as session:
+        started = session.exec(
+            select(JobCheckpoint.run_key)
+            .where(
+                JobCheckpoint.job_name == REMINDER_JOB,
+                JobCheckpoint.shard == RUN_STARTED_SHARD,
+                JobCheckpoint.completed_at >= now - REMINDER_RESUME_WINDOW,
+            )
+            .order_by(JobCheckpoint.completed_at)
+        ).all()
+        if not started:
+            return []
+        done = dict(
+            session.exec(
+                select(JobCheckpoint.run_key, func.count())
+                .where(
+                    JobCheckpoint.job_name == REMINDER_JOB,
+                    JobCheckpoint.run_key.in_(started),
+                    JobCheckpoint.shard != RUN_STARTED_SHARD,
+                )
+                .group_by(JobCheckpoint.run_key)
+            ).all()
+        )
+    return [run_key for run_key in started if done.get(run_key, 0) < _run_shards(run_key)]
+
+
+# Process the shards of `run_key` that have no checkpoint yet
+def _sweep(run_key: str, workers: int):
+    shards = _run_shards(run_key)
+    now = datetime.now()
+    with Session(engine) as session:
+        checkpoints = set(
+            session.exec(
+                select(JobCheckpoint.shard).where(
+                    JobCheckpoint.job_name == REMINDER_JOB,
+                    JobCheckpoint.run_key == run_key,
+                )
+            ).all()
+        )
+        if RUN_STARTED_SHARD not in checkpoints:
+            session.add(
+                JobCheckpoint(job_name=REMINDER_JOB, run_key=run_key, shard=RUN_STARTED_SHARD)
+            )
+            session.commit()
+    remaining = [shard for shard in range(shards) if shard not in checkpoints]
+    metrics.set("reminders.shards_remaining", len(remaining))
+
+    # SQLite allows a single writer, parallel shards would only contend
+    if engine.dialect.name == "sqlite":
+        workers = 1
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(_remind_shard, shard, shards, now, run_key): shard
+            for shard in remaining
+        }
+        pending = len(remaining)
+        for future in as_completed(futures):
+            try:
+                future.result()
+                pending -= 1
+                metrics.set("reminders.shards_remaining", pending)
+            except Exception as e:
+                metrics.inc("reminders.errors")
+                print(f"[DueDateChecker Error] shard {futures[future]}: {e}")
+
+
+# Finish runs that were interrupted (crash, deploy, lost lease). Runs when
+# this process becomes the scheduler leader and before every new sweep.
+def resume_due_date_sweeps(workers: int = REMINDER_WORKERS):
+    try:
+        for run_key in _incomplete_reminder_runs(datetime.now()):
+            metrics.inc("reminders.runs_resumed")
+            _sweep(run_key, workers)
+    except Exception as e:
+        metrics.inc("reminders.errors")
+        print(f"[DueDateChecker Error] resume: {e}")
+
+
+# Background job to check task due dates and notify assignees, run daily at
+# REMINDER_SWEEP_HOUR. Each day's run has its own key; shards already
+# checkpointed for it are skipped.
+def check_due_dates(shards: int = REMINDER_SHARDS, workers: int = REMINDER_WORKERS):
+    resume_due_date_sweeps(workers)
     try:
-        with Session(engine) as session:
-            now = datetime.now()
-            tomorrow = now + timedelta(days=1)
-
-            tasks = session.exec(select(Task).where(Task.due_date is not None)).all()
-
-            for task in tasks:
-                if not task.due_date:
-                    continue
-
-                # Load task.assignments relationship manually if needed
-                if not hasattr(task, "assignments") or not task.assignments:
-                    task.assignments = session.exec(
-                        select(task.assignment_model).where(
-                            task.assignment_model.task_id == task.id
-                        )
-                    ).all()
-
-                for assignment in task.assignments:
-                    user_id = assignment.user_id
-
-                    if task.due_date.date() == tomorrow.date():
-                        message = f"Reminder: Task '{task.title}' is due tomorrow."
-                    elif task.due_date.date() == now.date():
-                        message = f"Task '{task.title}' is due today!"
-                    elif task.due_date < now:
-                        message = f"Task '{task.title}' is overdue!"
-                    else:
-                        continue
-
-                    # TODO: prevent duplicate notifications (e.g., via a unique constraint or last sent time)
-
-                    create_notification(
-                        session=session,
-                        recipient_user_id=user_id,
-                        message=message,
-                        task_id=task.id,
-                        notif_type=NotificationType.GENERAL,
-                    )
+        _sweep(_run_key(datetime.now().date(), shards), workers)
     except Exception as e:
+        metrics.inc("reminders.errors")
         print(f"[DueDateChecker Error] {e}")
 
 
-# Initialize and start the background scheduler
+# Every replica runs the scheduler, but jobs only execute in the process
+# holding the "scheduler" lease.
 scheduler = BackgroundScheduler()
-scheduler.add_job(check_due_dates, "interval", hours=24)
-scheduler.start()
+
+
+def _on_leader_acquired():
+    # Anything left from an earlier term may be stale; the next tick reseeds
+    reminder_timer.clear()
+    # One-off job, so the sweep never delays lease renewals
+    scheduler.add_job(scheduler_lease.leader_only(resume_due_date_sweeps))
+
+
+scheduler_lease = LeaderLease("scheduler", on_acquired=_on_leader_acquired, on_lost=reminder_timer.clear)
+
+
+# Due date changes published by any process (utils.reminder_timer.reschedule_reminders);
+# only the leader keeps a timer, the others ignore them.
+async def _apply_reminder_change(message: str):
+    if not scheduler_lease.is_leader():
+        return
+    change = json.loads(message)
+    due_date = datetime.fromisoformat(change["due_date"]) if change["due_date"] else None
+    reminder_timer.schedule(change["task_id"], due_date)
+
+
+backplane.subscribe(REMINDERS_CHANNEL, _apply_reminder_change)
+scheduler.add_job(scheduler_lease.renew, "interval", seconds=LEASE_RENEW_INTERVAL)
+scheduler.add_job(scheduler_lease.leader_only(fire_due_reminders), "interval", seconds=REMINDER_TICK_SECONDS)
+# Full sharded sweep, a safety net for anything the timer missed
+scheduler.add_job(
+    scheduler_lease.leader_only(check_due_dates), "cron", hour=REMINDER_SWEEP_HOUR, minute=0
+)
+scheduler.add_job(scheduler_lease.leader_only(run_notification_retention), "interval", hours=1)
+scheduler.add_job(scheduler_lease.leader_only(purge_outbox_events), "interval", hours=1)
+if NOTIFICATION_DIGEST_HOURS:
+    scheduler.add_job(
+        scheduler_lease.leader_only(build_notification_digests),
+        "interval",
+        hours=NOTIFICATION_DIGEST_HOURS,
+    )
+
+
+# Initialize and start the background scheduler (called from the app lifespan)
+def start_scheduler():
+    scheduler_lease.renew()
+    scheduler.start()
+
+
+def shutdown_scheduler():
+    scheduler.shutdown(wait=False)
+    scheduler_lease.release()
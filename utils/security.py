@@ -2,10 +2,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from sqlmodel import Session, select
 from models.user import User
 from db.database import get_session
+from utils.auth_cache import principal_cache
+from utils.passwords import password_hasher
+from utils.activity import activity_buffer
 import os
 from dotenv import load_dotenv
 
@@ -19,17 +21,15 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-
-# Hashing utility functions
+# Hashing utility functions (blocking); async routes should await
+# password_hasher.hash / password_hasher.verify_and_update instead
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash_sync(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_sync(plain_password, hashed_password)
 
 
 # JWT token creation
@@ -58,9 +58,18 @@ oauth2_scheme = OAuth2PasswordBearer(
 )  # Adjust tokenUrl if different
 
 
-async def get_current_user(
+# Resolve the bearer token to a User. A plain `def` so FastAPI runs it in the
+# threadpool; repeat requests with the same token are answered from the
+# principal cache without touching the database.
+def get_current_user(
     token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)
 ):
+    user = principal_cache.get(token)
+    if user is not None:
+        activity_buffer.record_seen(user.user_id)
+        return user
+    cache_version = principal_cache.version
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -81,4 +90,6 @@ async def get_current_user(
     ).first()  # Or User.id depending on your model
     if user is None:
         raise credentials_exception
+    principal_cache.put(token, user, payload.get("exp", 0), cache_version)
+    activity_buffer.record_seen(user.user_id)
     return user